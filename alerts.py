@@ -0,0 +1,462 @@
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+
+try:
+    import fcntl
+    FILE_LOCK_SUPPORT = True
+except ImportError:  # Windows: each process keeps its own spill files instead
+    FILE_LOCK_SUPPORT = False
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ALERT_FILE = os.path.join(BASE_DIR, 'alerts.jsonl')
+DEFAULT_SPILL_PATH = os.path.join(BASE_DIR, 'alert_spill.jsonl')
+
+# Sinks the shared dispatcher sends to, besides the local alert file
+ALERT_SOCKET_ENV = 'EEG_ALERT_SOCKET'
+ALERT_URL_ENV = 'EEG_ALERT_URL'
+
+# Repeat alerts for the same patient within this many seconds are suppressed
+DEFAULT_COOLDOWN = 60.0
+
+
+def make_alert(patient_id=None, kind='seizure', confidence=None, model_version=None, **details):
+    """A JSON-serializable alert record"""
+    alert = {
+        'id': uuid.uuid4().hex,
+        'ts': time.time(),
+        'kind': kind,
+        'patient_id': patient_id or None,
+        'confidence': confidence,
+        'model_version': model_version,
+    }
+    alert.update(details)
+    return alert
+
+
+@contextlib.contextmanager
+def _file_lock(path, blocking=True):
+    """Exclusive lock on `path` across processes; yields whether it was taken"""
+    with open(path, 'a') as file:
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def _jsonl(alerts):
+    return ''.join(json.dumps(alert) + '\n' for alert in alerts).encode('utf-8')
+
+
+class FileSink:
+    """Appends alerts as JSON lines to a local file (a record; notifies no one)"""
+
+    remote = False
+
+    def __init__(self, path=DEFAULT_ALERT_FILE, name='file'):
+        self.path = path
+        self.name = name
+
+    def send(self, alerts):
+        with open(self.path, 'ab') as file:
+            file.write(_jsonl(alerts))
+
+
+class UnixSocketSink:
+    """Writes alerts as JSON lines to a Unix stream socket (e.g. a local notifier daemon)"""
+
+    remote = True
+
+    def __init__(self, path, timeout=2.0, name='socket'):
+        self.path = path
+        self.timeout = timeout
+        self.name = name
+
+    def send(self, alerts):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            connection.connect(self.path)
+            connection.sendall(_jsonl(alerts))
+
+
+class HttpSink:
+    """POSTs each batch as a JSON array; any non-2xx response is a failure"""
+
+    remote = True
+
+    def __init__(self, url, timeout=2.0, headers=None, name='http'):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+        self.name = name
+
+    def send(self, alerts):
+        request = urllib.request.Request(self.url, data=json.dumps(alerts).encode('utf-8'),
+                                         headers=self.headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise OSError(f"HTTP {response.status} from {self.url}")
+
+
+class _SinkWorker:
+    """Delivery thread, queue and spill file for one sink
+
+    A failed send is not retried inline: the batch goes to the sink's spill
+    file and the sink is backed off. Batches arriving during the backoff
+    are spilled without trying the sink. When the backoff ends, the spill
+    file is replayed first; each failure doubles the backoff (up to
+    max_backoff), a success resets it.
+
+    Errors on the delivery thread (including spill file I/O) are counted in
+    `errors` and the latest is kept in `last_error`; they never stop the
+    thread. Alerts that could be neither sent nor spilled count as dropped.
+    Every app process shares the spill file, so appends and replays take a
+    file lock and only one process replays a sink's spill at a time.
+    """
+
+    def __init__(self, sink, spill_path, max_queue, batch_size, flush_interval,
+                 backoff, max_backoff):
+        self.sink = sink
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.sent = 0
+        self.failed = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None  # (timestamp, message) of the latest delivery or spill error
+        self._dropped_lock = threading.Lock()
+        self._delay = backoff
+        self._retry_at = 0.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name=f'alert-{sink.name}', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, alert):
+        """Queue an alert; False if the queue is full and it was dropped"""
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            # Never block or touch the disk on the caller's thread
+            self._count_dropped(1)
+            return False
+        return True
+
+    def _count_dropped(self, count):
+        # Callers' threads and the delivery thread both drop alerts
+        with self._dropped_lock:
+            self.dropped += count
+
+    def _record_error(self, error):
+        self.errors += 1
+        self.last_error = (time.time(), f"{type(error).__name__}: {error}")
+
+    def _back_off(self):
+        self._retry_at = time.monotonic() + self._delay
+        self._delay = min(self._delay * 2, self.max_backoff)
+
+    def _lock(self, suffix, blocking=True):
+        if not FILE_LOCK_SUPPORT:
+            return contextlib.nullcontext(True)
+        return _file_lock(self.spill_path + suffix, blocking)
+
+    def _run(self):
+        pending = []
+        last_flush = time.monotonic()
+        stop = False
+        self._safely(self._replay_spill)
+
+        while not stop:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is None:
+                    stop = True
+                else:
+                    pending.append(item)
+            except queue.Empty:
+                pass
+
+            if pending and (stop or len(pending) >= self.batch_size
+                            or time.monotonic() - last_flush >= self.flush_interval):
+                batch, pending = pending, []
+                self._safely(self._deliver, batch)
+            if not pending:
+                last_flush = time.monotonic()
+
+            if not stop and time.monotonic() >= self._retry_at:
+                self._safely(self._replay_spill)
+
+        # Spill whatever is left on shutdown rather than wait on the sink
+        remaining = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                remaining.append(item)
+        if remaining:
+            self._safely(self._spill, remaining)
+
+    def _safely(self, step, *args):
+        """Run one delivery step; an error is recorded and never ends the thread"""
+        try:
+            step(*args)
+        except Exception as e:
+            self._record_error(e)
+            self._back_off()
+
+    def _send(self, alerts):
+        """One attempt; on failure back off and return False"""
+        try:
+            self.sink.send(alerts)
+        except Exception as e:
+            self.failed += 1
+            self._record_error(e)
+            self._back_off()
+            return False
+        self.sent += len(alerts)
+        self._delay = self.backoff
+        self.last_error = None
+        return True
+
+    def _deliver(self, alerts):
+        # Earlier alerts waiting in the spill file go first
+        if time.monotonic() >= self._retry_at:
+            self._replay_spill()
+        if time.monotonic() < self._retry_at or not self._send(alerts):
+            self._spill(alerts)
+
+    def _spill(self, alerts):
+        """Append alerts to the spill file; if that fails they are dropped"""
+        try:
+            with self._lock('.lock'):
+                with open(self.spill_path, 'a') as file:
+                    file.write(''.join(json.dumps(alert) + '\n' for alert in alerts))
+        except OSError as e:
+            self._record_error(e)
+            self._count_dropped(len(alerts))
+            return
+        self.spilled += len(alerts)
+
+    def _replay_spill(self):
+        """Resend spilled alerts; stop at the first failure and keep the rest"""
+        replaying = f"{self.spill_path}.replay"
+        if not os.path.exists(self.spill_path) and not os.path.exists(replaying):
+            return
+
+        with self._lock('.replay.lock', blocking=False) as locked:
+            if not locked:
+                return  # another process is replaying this sink's spill
+            try:
+                with self._lock('.lock'):
+                    # A leftover .replay file means an earlier replay was interrupted
+                    if os.path.exists(self.spill_path) and not os.path.exists(replaying):
+                        os.replace(self.spill_path, replaying)
+                if not os.path.exists(replaying):
+                    return
+                alerts = []
+                with open(replaying) as file:
+                    for line in file:
+                        try:
+                            alerts.append(json.loads(line))
+                        except ValueError:
+                            continue  # a line cut short by a crash
+                os.remove(replaying)
+            except OSError as e:
+                self._record_error(e)
+                self._back_off()
+                return
+
+            for start in range(0, len(alerts), self.batch_size):
+                if not self._send(alerts[start:start + self.batch_size]):
+                    self._spill(alerts[start:])
+                    return
+
+    def close(self, timeout):
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {'queued': self._queue.qsize(), 'sent': self.sent, 'failed': self.failed,
+                'spilled': self.spilled, 'dropped': self.dropped, 'errors': self.errors,
+                'last_error': self.last_error, 'alive': self._thread.is_alive()}
+
+
+class AlertDispatcher:
+    """Asynchronous alert delivery to one or more sinks
+
+    dispatch() only puts the alert on each sink's bounded in-process queue,
+    so the prediction path never waits for delivery or touches the disk.
+    Every sink has its own delivery thread, so a sink that is down never
+    holds up the others. Alerts are sent in batches; a failed batch is
+    appended to that sink's JSON-lines spill file and retried from there
+    with exponential backoff, and spill files are also replayed when the
+    dispatcher starts, so alerts survive outages and restarts. If a sink's
+    queue is full the alert is dropped for that sink and counted. Without
+    file locks (Windows), each process gets its own spill files.
+
+    Repeat alerts for a patient within `cooldown` seconds are suppressed,
+    so an ongoing event raises one notification, not one per window.
+    """
+
+    def __init__(self, sinks, spill_path=DEFAULT_SPILL_PATH, max_queue=10000, batch_size=100,
+                 flush_interval=0.2, backoff=0.5, max_backoff=30.0, cooldown=DEFAULT_COOLDOWN):
+        if not sinks:
+            raise ValueError("AlertDispatcher needs at least one sink")
+        self.cooldown = cooldown
+        self.suppressed = 0
+        self._last_alert = {}
+        self._closed = False
+
+        root, extension = os.path.splitext(spill_path)
+        if not FILE_LOCK_SUPPORT:
+            root = f"{root}.{os.getpid()}"
+        self._workers = {
+            sink.name: _SinkWorker(sink, f"{root}.{sink.name}{extension}", max_queue, batch_size,
+                                   flush_interval, backoff, max_backoff)
+            for sink in sinks
+        }
+
+    @property
+    def sinks(self):
+        return {name: worker.sink for name, worker in self._workers.items()}
+
+    @property
+    def notifies_remote(self):
+        """Whether any sink delivers beyond the local alert file"""
+        return any(getattr(worker.sink, 'remote', True) for worker in self._workers.values())
+
+    def dispatch(self, alert):
+        """Queue an alert for delivery; never blocks and does no I/O
+
+        Returns whether at least one remote sink (socket or HTTP) queued the
+        alert, or None if it was suppressed by the per-patient cooldown.
+        """
+        patient_id = alert.get('patient_id')
+        if self.cooldown and patient_id is not None:
+            last = self._last_alert.get(patient_id)
+            if last is not None and alert['ts'] - last < self.cooldown:
+                self.suppressed += 1
+                return None
+            self._last_alert[patient_id] = alert['ts']
+
+        queued_remote = False
+        for worker in self._workers.values():
+            if worker.enqueue(alert) and getattr(worker.sink, 'remote', True):
+                queued_remote = True
+        return queued_remote
+
+    def stats(self):
+        per_sink = {name: worker.stats() for name, worker in self._workers.items()}
+        totals = {key: sum(sink[key] for sink in per_sink.values())
+                  for key in ('queued', 'sent', 'failed', 'spilled', 'dropped', 'errors')}
+        return {**totals, 'suppressed': self.suppressed, 'sinks': per_sink}
+
+    def close(self, timeout=5.0):
+        """Send or spill queued alerts and stop the delivery threads"""
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers.values():
+            worker.close(timeout)
+
+
+def default_sinks():
+    """The local alert file, plus a socket and/or HTTP sink named by the environment"""
+    sinks = [FileSink(DEFAULT_ALERT_FILE)]
+    if os.environ.get(ALERT_SOCKET_ENV):
+        sinks.append(UnixSocketSink(os.environ[ALERT_SOCKET_ENV]))
+    if os.environ.get(ALERT_URL_ENV):
+        sinks.append(HttpSink(os.environ[ALERT_URL_ENV]))
+    return sinks
+
+
+_shared_dispatcher = None
+_shared_dispatcher_lock = threading.Lock()
+
+
+def get_alert_dispatcher():
+    """Process-wide AlertDispatcher, so all sessions share its delivery threads"""
+    global _shared_dispatcher
+    with _shared_dispatcher_lock:
+        if _shared_dispatcher is None:
+            _shared_dispatcher = AlertDispatcher(default_sinks())
+            atexit.register(_shared_dispatcher.close)
+        return _shared_dispatcher
+
+
+def serve(host='127.0.0.1', port=8765):
+    """Local HTTP stand-in for a notification service; prints every batch it receives"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Receiver(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            try:
+                alerts = json.loads(body)
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            for alert in alerts:
+                print(f"alert {alert.get('id')}: {alert.get('kind')} for patient "
+                      f"{alert.get('patient_id') or '-'} (confidence {alert.get('confidence')})")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Receiver)
+    print(f"Receiving alerts on http://{host}:{port}/ (set {ALERT_URL_ENV} to this URL)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert notification tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve', help="run a local HTTP receiver for testing")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    test_parser = subparsers.add_parser('test', help="send a test alert through the configured sinks")
+    test_parser.add_argument('--patient', default='test-patient')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.host, args.port)
+    else:
+        dispatcher = AlertDispatcher(default_sinks())
+        dispatcher.dispatch(make_alert(args.patient, kind='test'))
+        dispatcher.close()
+        print(dispatcher.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from page1 import page_1
 from page2 import page_2
 from page3 import page_3
 from page4 import page_4
+from page5 import page_5
 
 def main():
     """Main function to run the Streamlit application"""
@@ -29,8 +30,8 @@ def main():
     st.sidebar.title("Navigation")
     page_selection = st.sidebar.selectbox(
         "Go to", 
-        ["Home", "About Epilepsy", "Prediction", "Precautions"],
-        index=["Home", "About Epilepsy", "Prediction", "Precautions"].index(st.session_state.page_selection)
+        ["Home", "About Epilepsy", "Prediction", "History", "Precautions"],
+        index=["Home", "About Epilepsy", "Prediction", "History", "Precautions"].index(st.session_state.page_selection)
     )
     
     # Update session state when sidebar selection changes
@@ -45,6 +46,8 @@ def main():
         page_4()
     elif st.session_state.page_selection == "Prediction":
         page_2()
+    elif st.session_state.page_selection == "History":
+        page_5()
     elif st.session_state.page_selection == "Precautions":
         page_3()
 
@@ -0,0 +1,47 @@
+import numpy as np
+
+from model_definitions import channel_contributions, pattern_differences
+
+
+def prepare_batch(X, n_features):
+    """Return X as a 2D float array with exactly n_features columns"""
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.shape[1] < n_features:
+        # Pad missing trailing channels with zeros, as the single-window path does
+        padded = np.zeros((X.shape[0], n_features))
+        padded[:, :X.shape[1]] = X
+        return padded
+    return X[:, :n_features]
+
+
+def predict_batch(X, model, return_contributions=False):
+    """Vectorized seizure prediction for a batch of EEG windows
+
+    Uses the same pattern-similarity rule as page2.predict_seizure and
+    returns (predictions, confidences) arrays. The model must expose
+    feature_importance, seizure_signature and normal_signature.
+
+    With return_contributions=True a third (n_windows, n_channels) array of
+    per-channel contributions is returned (see channel_contributions). It
+    reuses the per-channel differences the prediction needs anyway.
+    """
+    X = prepare_batch(X, len(model.seizure_signature))
+
+    seizure_differences = pattern_differences(X, model.seizure_signature, model.feature_importance)
+    normal_differences = pattern_differences(X, model.normal_signature, model.feature_importance)
+    seizure_similarity = 1.0 / (1.0 + seizure_differences.sum(axis=1))
+    normal_similarity = 1.0 / (1.0 + normal_differences.sum(axis=1))
+
+    # If the input is more similar to the seizure pattern, classify as seizure
+    predictions = (seizure_similarity > normal_similarity).astype(int)
+
+    # Confidence is the relative similarity of the winning pattern
+    total = seizure_similarity + normal_similarity
+    winning = np.where(predictions == 1, seizure_similarity, normal_similarity)
+    confidences = np.where(total > 0, winning / np.where(total > 0, total, 1.0), 0.5)
+
+    if return_contributions:
+        return predictions, confidences, channel_contributions(seizure_differences, normal_differences)
+    return predictions, confidences
@@ -0,0 +1,222 @@
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_scoring import predict_batch
+from channels import CHANNEL_ALIASES, CHANNEL_MAX, CHANNEL_MIN, CHANNEL_NAMES
+
+# EDF support is optional; CSV import works without it
+try:
+    import pyedflib
+    EDF_SUPPORT = True
+except ImportError:
+    EDF_SUPPORT = False
+
+DEFAULT_CHUNK_ROWS = 100000
+
+# Per-channel explanation columns in the bulk results
+CONTRIBUTION_COLUMNS = [f"{name} contribution" for name in CHANNEL_NAMES]
+
+# Scale factors from EDF physical dimensions to the volts used by the app
+EDF_UNIT_SCALE = {'v': 1.0, 'mv': 1e-3, 'uv': 1e-6, 'µv': 1e-6}
+
+
+def _select_channel_columns(columns):
+    """Map file columns onto the app's channels, in channel order"""
+    normalized = {}
+    for column in columns:
+        name = str(column).strip()
+        normalized.setdefault(CHANNEL_ALIASES.get(name, name), column)
+
+    if all(name in normalized for name in CHANNEL_NAMES):
+        return [normalized[name] for name in CHANNEL_NAMES]
+    # A 7-channel file (like values.py) repeats T8-P8 as the 8th channel
+    if all(name in normalized for name in CHANNEL_NAMES[:-1]):
+        return [normalized[name] for name in CHANNEL_NAMES[:-1]] + [normalized[CHANNEL_NAMES[-2]]]
+    return None
+
+
+def iter_csv_chunks(source, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (n_rows, 8) float arrays from a CSV file in chunks
+
+    Columns are matched by channel name. Referential recordings (one column
+    per electrode) are converted with the default montage; files without a
+    recognised header are read positionally, taking the first eight columns.
+    """
+    header = pd.read_csv(source, nrows=0)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    columns = _select_channel_columns(header.columns)
+    if columns is None:
+        from montage import DEFAULT_MONTAGE, iter_referential_csv
+        if DEFAULT_MONTAGE.select_columns(header.columns) is not None:
+            # Referential recording: derive the bipolar channels
+            for X in iter_referential_csv(source, DEFAULT_MONTAGE, chunk_rows):
+                yield DEFAULT_MONTAGE.apply(X)
+            return
+
+        n_columns = min(len(header.columns), len(CHANNEL_NAMES))
+        if n_columns < len(CHANNEL_NAMES) - 1:
+            raise ValueError(f"Expected {len(CHANNEL_NAMES)} channel columns, found {len(header.columns)}")
+        # Skip a non-numeric header line if there is one. Test the raw first
+        # line: parsed as a header, repeated values get mangled ("x.1")
+        first_line = pd.read_csv(source, header=None, nrows=1, dtype=str)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        skip_first = not all(_is_number(value) for value in first_line.iloc[0, :n_columns])
+        reader = pd.read_csv(source, header=None, chunksize=chunk_rows, usecols=range(n_columns),
+                             skiprows=1 if skip_first else 0)
+        for chunk in reader:
+            X = chunk.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            if n_columns < len(CHANNEL_NAMES):
+                # Repeat T8-P8 as the 8th channel
+                X = np.hstack([X, X[:, -1:]])
+            yield X
+        return
+
+    for chunk in pd.read_csv(source, usecols=sorted(set(columns), key=list(header.columns).index),
+                             chunksize=chunk_rows):
+        chunk = chunk.apply(pd.to_numeric, errors='coerce')
+        yield chunk[columns].to_numpy(dtype=float)
+
+
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def iter_edf_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (n_rows, 8) float arrays, in volts, from an EDF recording"""
+    if not EDF_SUPPORT:
+        raise ImportError("EDF import requires the pyedflib package")
+
+    with pyedflib.EdfReader(path) as reader:
+        labels = reader.getSignalLabels()
+        columns = _select_channel_columns(labels)
+        if columns is None:
+            raise ValueError(f"EDF file does not contain the channels {', '.join(CHANNEL_NAMES)}")
+
+        indices = [labels.index(label) for label in columns]
+        scales = [EDF_UNIT_SCALE.get(reader.getPhysicalDimension(i).strip().lower(), 1.0)
+                  for i in indices]
+        n_samples = min(reader.getNSamples()[i] for i in indices)
+
+        buffer = np.empty((chunk_rows, len(indices)))
+        for start in range(0, n_samples, chunk_rows):
+            n = min(chunk_rows, n_samples - start)
+            for j, (i, scale) in enumerate(zip(indices, scales)):
+                buffer[:n, j] = reader.readSignal(i, start, n) * scale
+            yield buffer[:n].copy()
+
+
+def iter_upload_chunks(uploaded_file, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield chunks from a Streamlit upload, dispatching on the file extension"""
+    name = uploaded_file.name.lower()
+    if name.endswith('.edf'):
+        # pyedflib needs a real file path
+        with tempfile.NamedTemporaryFile(suffix='.edf', delete=False) as tmp:
+            tmp.write(uploaded_file.getbuffer())
+        try:
+            yield from iter_edf_chunks(tmp.name, chunk_rows)
+        finally:
+            os.unlink(tmp.name)
+    else:
+        yield from iter_csv_chunks(uploaded_file, chunk_rows)
+
+
+def validate_chunk(X, mode='clip'):
+    """Check every row against the channel ranges with vectorized masks
+
+    Returns (X, out_of_range, scorable). In 'clip' mode out-of-range values
+    are clipped into range and the row is still scored; in 'flag' mode such
+    rows are left as-is and excluded from scoring. Rows with missing or
+    non-numeric values are never scored.
+    """
+    if mode not in ('clip', 'flag'):
+        raise ValueError(f"Unknown validation mode: {mode}")
+
+    finite = np.isfinite(X).all(axis=1)
+    out_of_range = ((X < CHANNEL_MIN) | (X > CHANNEL_MAX)).any(axis=1)
+
+    if mode == 'clip':
+        X = np.clip(X, CHANNEL_MIN, CHANNEL_MAX)
+        scorable = finite
+    else:
+        scorable = finite & ~out_of_range
+
+    return X, out_of_range, scorable
+
+
+def run_bulk_prediction(chunks, model, mode='clip'):
+    """Validate and batch-score every chunk
+
+    Returns (results DataFrame, report dict with row counts and throughput).
+    Each scored row also carries its per-channel contributions and the
+    channel that drove its prediction.
+    """
+    start = time.perf_counter()
+    scoring_time = 0.0
+    frames = []
+    report = {'rows': 0, 'scored': 0, 'out_of_range': 0, 'invalid': 0, 'seizure': 0}
+
+    for chunk in chunks:
+        X, out_of_range, scorable = validate_chunk(chunk, mode)
+
+        predictions = np.full(len(X), np.nan)
+        confidences = np.full(len(X), np.nan)
+        contributions = np.full(X.shape, np.nan)
+        top_channel = np.full(len(X), -1)
+        if scorable.any():
+            score_start = time.perf_counter()
+            scored_predictions, scored_confidences, scored_contributions = predict_batch(
+                X[scorable], model, return_contributions=True)
+            scoring_time += time.perf_counter() - score_start
+
+            predictions[scorable] = scored_predictions
+            confidences[scorable] = scored_confidences
+            contributions[scorable] = scored_contributions
+            # The channel that pushed hardest towards the predicted class
+            top_channel[scorable] = np.where(scored_predictions == 1,
+                                             scored_contributions.argmax(axis=1),
+                                             scored_contributions.argmin(axis=1))
+
+        frame = pd.DataFrame(X, columns=CHANNEL_NAMES)
+        frame['out_of_range'] = out_of_range
+        # Rows that were not scored get a missing prediction
+        frame['prediction'] = pd.Series(predictions).astype('Int64')
+        frame['confidence'] = confidences
+        frame[CONTRIBUTION_COLUMNS] = contributions
+        # Code -1 (unscored) becomes a missing category
+        frame['top_channel'] = pd.Categorical.from_codes(top_channel, categories=CHANNEL_NAMES)
+        frames.append(frame)
+
+        report['rows'] += len(X)
+        report['scored'] += int(scorable.sum())
+        report['out_of_range'] += int(out_of_range.sum())
+        report['invalid'] += int((~np.isfinite(chunk).all(axis=1)).sum())
+        report['seizure'] += int(np.nansum(predictions))
+
+    elapsed = time.perf_counter() - start
+    report['elapsed_s'] = elapsed
+    report['rows_per_s'] = report['rows'] / elapsed if elapsed > 0 else float('inf')
+    report['scoring_rows_per_s'] = report['scored'] / scoring_time if scoring_time > 0 else float('inf')
+
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=CHANNEL_NAMES + ['out_of_range', 'prediction', 'confidence']
+        + CONTRIBUTION_COLUMNS + ['top_channel'])
+    return results, report
+
+
+def results_to_csv(results):
+    """Serialize bulk results for download"""
+    buffer = io.StringIO()
+    results.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
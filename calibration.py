@@ -0,0 +1,393 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_definitions import pattern_distances
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CALIBRATION_PATH = os.path.join(BASE_DIR, 'calibration.json')
+
+# Default alert-volume budget when picking an operating point
+DEFAULT_MAX_ALERTS_PER_HOUR = 1.0
+# Blocks the isotonic fit starts from; bounds the cost of pool-adjacent-violators
+DEFAULT_ISOTONIC_BINS = 10000
+
+
+def decision_scores(X, model):
+    """Signed margin of each window: normal distance minus seizure distance
+
+    Positive means closer to the seizure signature; the model predicts
+    seizure exactly when the margin is above zero. This equals the row sum of
+    the per-channel contributions from batch_scoring.predict_batch. Unlike
+    the similarity ratio it does not crowd around 0.5, so it is the score
+    calibration and threshold sweeps work on.
+    """
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    return (pattern_distances(X, model.normal_signature, model.feature_importance)
+            - pattern_distances(X, model.seizure_signature, model.feature_importance))
+
+
+def _finite(scores, labels):
+    scores = np.asarray(scores, dtype=float).ravel()
+    labels = np.asarray(labels).ravel() == 1
+    keep = np.isfinite(scores)
+    return scores[keep], labels[keep]
+
+
+class PlattCalibrator:
+    """Logistic calibration of a score: p = 1 / (1 + exp(-(a * z + b)))
+
+    Scores are standardized first (z), since raw margins are ~1e-5. Fitted
+    by Newton's method with Platt's smoothed targets, all vectorized.
+    """
+
+    method = 'platt'
+
+    def __init__(self):
+        self.mean = 0.0
+        self.scale = 1.0
+        self.a = 1.0
+        self.b = 0.0
+
+    def fit(self, scores, labels, max_iter=100, tol=1e-10):
+        scores, labels = _finite(scores, labels)
+        n_pos = int(labels.sum())
+        n_neg = len(labels) - n_pos
+        if n_pos == 0 or n_neg == 0:
+            raise ValueError("Calibration needs both seizure and normal examples")
+
+        self.mean = float(scores.mean())
+        self.scale = float(scores.std()) or 1.0
+        z = (scores - self.mean) / self.scale
+        # Platt's targets keep the fit from running off to 0/1 on separable data
+        target = np.where(labels, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+
+        def loss(a, b):
+            f = a * z + b
+            return float((np.logaddexp(0.0, f) - target * f).sum())
+
+        a, b = 0.0, float(np.log((n_pos + 1.0) / (n_neg + 1.0)))
+        current = loss(a, b)
+        for _ in range(max_iter):
+            p = 1.0 / (1.0 + np.exp(-(a * z + b)))
+            residual = p - target
+            weight = p * (1.0 - p)
+            gradient = np.array([(residual * z).sum(), residual.sum()])
+            hessian = np.array([[(weight * z * z).sum(), (weight * z).sum()],
+                                [(weight * z).sum(), weight.sum()]]) + 1e-12 * np.eye(2)
+            step = np.linalg.solve(hessian, gradient)
+
+            # Halve the step until the loss goes down
+            scale = 1.0
+            while scale > 1e-8:
+                new_a, new_b = a - scale * step[0], b - scale * step[1]
+                new = loss(new_a, new_b)
+                if new <= current:
+                    break
+                scale /= 2.0
+            else:
+                break
+            a, b = new_a, new_b
+            improvement = current - new
+            current = new
+            if improvement <= tol * max(1.0, abs(current)):
+                break
+
+        self.a, self.b = float(a), float(b)
+        return self
+
+    def predict_proba(self, scores):
+        """Calibrated seizure probability for each score"""
+        z = (np.asarray(scores, dtype=float) - self.mean) / self.scale
+        return 1.0 / (1.0 + np.exp(-(self.a * z + self.b)))
+
+    def to_dict(self):
+        return {'method': self.method, 'mean': self.mean, 'scale': self.scale, 'a': self.a, 'b': self.b}
+
+    @classmethod
+    def from_dict(cls, data):
+        calibrator = cls()
+        calibrator.mean, calibrator.scale = data['mean'], data['scale']
+        calibrator.a, calibrator.b = data['a'], data['b']
+        return calibrator
+
+
+class IsotonicCalibrator:
+    """Monotone, non-parametric calibration by pool-adjacent-violators
+
+    Sorted scores are first pooled into at most max_bins equal-count
+    blocks (vectorized), so the PAV pass costs the same for millions of
+    windows as for thousands. Each fitted block is flat between its lowest
+    and highest score; probabilities are interpolated between blocks.
+    """
+
+    method = 'isotonic'
+
+    def __init__(self, max_bins=DEFAULT_ISOTONIC_BINS):
+        self.max_bins = max_bins
+        self.x = np.array([0.0])
+        self.y = np.array([0.5])
+
+    def fit(self, scores, labels):
+        scores, labels = _finite(scores, labels)
+        if len(scores) == 0:
+            raise ValueError("Calibration needs labeled examples")
+        order = np.argsort(scores, kind='stable')
+        scores = scores[order]
+        labels = labels[order].astype(float)
+
+        n = len(scores)
+        starts = np.unique(np.linspace(0, n, min(self.max_bins, n) + 1).astype(int)[:-1])
+        counts = np.diff(np.append(starts, n)).astype(float)
+        label_sums = np.add.reduceat(labels, starts)
+        lows = scores[starts]
+        highs = scores[np.append(starts[1:], n) - 1]
+
+        # Pool adjacent blocks while they violate monotonicity (or share a score)
+        block_lo, block_hi, block_y, block_n = [], [], [], []
+        for low, high, y_sum, count in zip(lows, highs, label_sums, counts):
+            block_lo.append(low)
+            block_hi.append(high)
+            block_y.append(y_sum)
+            block_n.append(count)
+            while len(block_n) > 1 and (
+                    block_y[-2] / block_n[-2] > block_y[-1] / block_n[-1]
+                    or block_hi[-2] >= block_lo[-1]):
+                high, y_sum, count = block_hi.pop(), block_y.pop(), block_n.pop()
+                block_lo.pop()
+                block_hi[-1] = high
+                block_y[-1] += y_sum
+                block_n[-1] += count
+
+        # Each block is flat from its lowest to its highest score, so both
+        # ends are interpolation knots (a block of one score gives one knot)
+        rates = np.array(block_y) / np.array(block_n)
+        block_lo, block_hi = np.array(block_lo), np.array(block_hi)
+        self.x = np.column_stack([block_lo, block_hi]).ravel()
+        self.y = np.repeat(rates, 2)
+        keep = np.append(True, np.diff(self.x) > 0)
+        self.x, self.y = self.x[keep], self.y[keep]
+        return self
+
+    def predict_proba(self, scores):
+        """Calibrated seizure probability for each score"""
+        return np.interp(np.asarray(scores, dtype=float), self.x, self.y)
+
+    def to_dict(self):
+        return {'method': self.method, 'x': self.x.tolist(), 'y': self.y.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        calibrator = cls()
+        calibrator.x = np.array(data['x'], dtype=float)
+        calibrator.y = np.array(data['y'], dtype=float)
+        return calibrator
+
+
+CALIBRATORS = {'platt': PlattCalibrator, 'isotonic': IsotonicCalibrator}
+
+
+def threshold_sweep(scores, labels, window_seconds=1.0, max_points=None):
+    """Confusion counts and ROC/PR curves for every distinct threshold
+
+    One descending sort and cumulative sums give the counts at every
+    threshold at once; a window raises an alert when its score is >= the
+    threshold. alerts_per_hour assumes each window covers window_seconds.
+    The first row (threshold inf) is the no-alert origin. max_points thins
+    the curve for display without changing its end points.
+    """
+    scores, labels = _finite(scores, labels)
+    n = len(scores)
+    order = np.argsort(scores, kind='stable')[::-1]
+    sorted_scores = scores[order]
+    tp = np.cumsum(labels[order])
+    fp = np.arange(1, n + 1) - tp
+
+    # Counts at a threshold are those at the last window with that score
+    last = np.flatnonzero(np.append(sorted_scores[1:] != sorted_scores[:-1], True)) if n else np.array([], dtype=int)
+    if max_points is not None and len(last) > max_points:
+        last = last[np.unique(np.linspace(0, len(last) - 1, max_points).astype(int))]
+
+    thresholds = np.append(np.inf, sorted_scores[last])
+    tp = np.append(0, tp[last])
+    fp = np.append(0, fp[last])
+    positives = int(labels.sum())
+    negatives = n - positives
+    alerts = tp + fp
+    hours = n * window_seconds / 3600.0
+
+    return pd.DataFrame({
+        'threshold': thresholds,
+        'tp': tp,
+        'fp': fp,
+        'fn': positives - tp,
+        'tn': negatives - fp,
+        'tpr': tp / positives if positives else np.zeros(len(tp)),
+        'fpr': fp / negatives if negatives else np.zeros(len(fp)),
+        'precision': np.divide(tp, alerts, out=np.ones(len(tp)), where=alerts > 0),
+        'alerts_per_hour': alerts / hours if hours > 0 else np.zeros(len(tp)),
+    })
+
+
+def roc_auc(sweep):
+    """Area under the ROC curve of a threshold sweep"""
+    fpr = sweep['fpr'].to_numpy()
+    tpr = sweep['tpr'].to_numpy()
+    return float((np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0).sum())
+
+
+def average_precision(sweep):
+    """Area under the precision-recall curve (step-wise, as average precision)"""
+    recall = sweep['tpr'].to_numpy()
+    precision = sweep['precision'].to_numpy()
+    return float((np.diff(recall) * precision[1:]).sum())
+
+
+def pick_operating_point(sweep, max_alerts_per_hour=DEFAULT_MAX_ALERTS_PER_HOUR, min_precision=None):
+    """Highest-recall threshold whose alert volume fits the budget
+
+    Returns the sweep row as a dict, or None if no threshold meets the
+    constraints.
+    """
+    feasible = sweep['alerts_per_hour'].to_numpy() <= max_alerts_per_hour
+    if min_precision is not None:
+        feasible &= sweep['precision'].to_numpy() >= min_precision
+    # Rows are ordered by decreasing threshold, so recall never decreases
+    candidates = np.flatnonzero(feasible[1:]) + 1
+    if len(candidates) == 0:
+        return None
+    return sweep.iloc[candidates[-1]].to_dict()
+
+
+class Calibration:
+    """A fitted calibrator plus the operating point chosen for it"""
+
+    def __init__(self, calibrator, threshold=None, window_seconds=1.0,
+                 max_alerts_per_hour=None, metrics=None):
+        self.calibrator = calibrator
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.max_alerts_per_hour = max_alerts_per_hour
+        self.metrics = metrics or {}
+
+    def predict_proba(self, scores):
+        return self.calibrator.predict_proba(scores)
+
+    def alerts(self, scores):
+        """1 where a score reaches the operating threshold"""
+        if self.threshold is None:
+            return (np.asarray(scores) > 0).astype(int)
+        return (np.asarray(scores) >= self.threshold).astype(int)
+
+    def save(self, path=DEFAULT_CALIBRATION_PATH):
+        data = {
+            'calibrator': self.calibrator.to_dict(),
+            'threshold': self.threshold,
+            'window_seconds': self.window_seconds,
+            'max_alerts_per_hour': self.max_alerts_per_hour,
+            'metrics': self.metrics,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CALIBRATION_PATH):
+        with open(path) as file:
+            data = json.load(file)
+        calibrator = CALIBRATORS[data['calibrator']['method']].from_dict(data['calibrator'])
+        return cls(calibrator, data.get('threshold'), data.get('window_seconds', 1.0),
+                   data.get('max_alerts_per_hour'), data.get('metrics'))
+
+
+def load_calibration(path=DEFAULT_CALIBRATION_PATH):
+    """The saved calibration, or None if none has been fitted"""
+    if not os.path.exists(path):
+        return None
+    return Calibration.load(path)
+
+
+def fit_calibration(scores, labels, method='platt', window_seconds=1.0,
+                    max_alerts_per_hour=DEFAULT_MAX_ALERTS_PER_HOUR, min_precision=None):
+    """Fit a calibrator, sweep thresholds and pick an operating point"""
+    calibrator = CALIBRATORS[method]().fit(scores, labels)
+    sweep = threshold_sweep(scores, labels, window_seconds)
+    point = pick_operating_point(sweep, max_alerts_per_hour, min_precision)
+
+    metrics = {'roc_auc': roc_auc(sweep), 'average_precision': average_precision(sweep),
+               'windows': int(sweep['tp'].iloc[-1] + sweep['fp'].iloc[-1])}
+    threshold = None
+    if point is not None:
+        threshold = float(point['threshold'])
+        metrics.update({'recall': float(point['tpr']), 'precision': float(point['precision']),
+                        'alerts_per_hour': float(point['alerts_per_hour'])})
+    calibration = Calibration(calibrator, threshold, window_seconds, max_alerts_per_hour, metrics)
+    return calibration, sweep
+
+
+def _labeled_csv(path, label_column, model):
+    """Scores and labels from a CSV with channel columns and a label column"""
+    from bulk_import import DEFAULT_CHUNK_ROWS, iter_csv_chunks
+    scores, labels = [], []
+    label_chunks = pd.read_csv(path, usecols=[label_column], chunksize=DEFAULT_CHUNK_ROWS)
+    for X, label_chunk in zip(iter_csv_chunks(path), label_chunks):
+        scores.append(decision_scores(X, model))
+        labels.append(label_chunk[label_column].to_numpy())
+    return np.concatenate(scores), np.concatenate(labels)
+
+
+def _synthetic(rows, model, seed):
+    from load_generator import SyntheticEEGGenerator
+    X, labels = SyntheticEEGGenerator(seed=seed).block(rows)
+    return decision_scores(X, model), labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit a score calibration and pick an operating point")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="labeled CSV of EEG readings")
+    source.add_argument('--synthetic', type=int, help="fit on this many synthetic windows instead")
+    parser.add_argument('--label-column', default='label', help="CSV column with 1 = seizure")
+    parser.add_argument('--method', choices=sorted(CALIBRATORS), default='platt')
+    parser.add_argument('--window-seconds', type=float, default=1.0, help="duration of one window")
+    parser.add_argument('--max-alerts-per-hour', type=float, default=DEFAULT_MAX_ALERTS_PER_HOUR)
+    parser.add_argument('--min-precision', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=DEFAULT_CALIBRATION_PATH)
+    args = parser.parse_args()
+
+    from shared_plane import default_model
+    model = default_model()
+    start = time.perf_counter()
+    if args.csv:
+        scores, labels = _labeled_csv(args.csv, args.label_column, model)
+    else:
+        scores, labels = _synthetic(args.synthetic, model, args.seed)
+    scored = time.perf_counter()
+
+    calibration, sweep = fit_calibration(scores, labels, args.method, args.window_seconds,
+                                         args.max_alerts_per_hour, args.min_precision)
+    fitted = time.perf_counter()
+    calibration.save(args.output)
+
+    metrics = calibration.metrics
+    print(f"windows: {metrics['windows']:,} (scored in {scored - start:.2f} s, "
+          f"calibrated and swept in {fitted - scored:.2f} s)")
+    print(f"ROC AUC: {metrics['roc_auc']:.4f}, average precision: {metrics['average_precision']:.4f}")
+    if calibration.threshold is None:
+        print(f"No threshold stays within {args.max_alerts_per_hour} alerts/hour")
+    else:
+        print(f"operating threshold: {calibration.threshold:.6e} -> recall {metrics['recall']:.3f}, "
+              f"precision {metrics['precision']:.3f}, {metrics['alerts_per_hour']:.2f} alerts/hour")
+    print(f"saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import numpy as np
+
+# EEG channels used by the prediction page and their accepted value ranges
+EEG_CHANNELS = [
+    ('FP1-F7', -0.000081, 0.000174),
+    ('C3-P3', -0.000012, 0.000058),
+    ('P3-O1', -0.000004, 0.000127),
+    ('P4-O2', 0.000017, 0.000164),
+    ('P7-O1', 0.000006, 0.000146),
+    ('P7-T7', -0.000067, 0.000013),
+    ('T8-P8', -0.000179, 0.000115),
+    ('T8-P8-1', -0.000179, 0.000115)  # Added the missing 8th channel
+]
+
+CHANNEL_NAMES = [name for name, _, _ in EEG_CHANNELS]
+CHANNEL_MIN = np.array([min_val for _, min_val, _ in EEG_CHANNELS])
+CHANNEL_MAX = np.array([max_val for _, _, max_val in EEG_CHANNELS])
+
+# Other spellings of the channel names found in recordings and in the
+# feature names of the legacy EE_model.pkl
+CHANNEL_ALIASES = {
+    '# FP1-F7': 'FP1-F7',
+    'T8-P8-0': 'T8-P8',
+}
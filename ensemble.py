@@ -0,0 +1,274 @@
+import os
+import pickle
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+from calibration import decision_scores, load_calibration
+from horizon import seizure_proximity
+from model_definitions import EnhancedEpilepsyModel, EpilepsyAnomalyDetector
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Default time (seconds) a single ensemble request may wait for its backends
+DEFAULT_LATENCY_BUDGET = 0.25
+# Calls one backend may have running at once; further requests skip it
+DEFAULT_WORKERS_PER_BACKEND = 2
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Unpickler that resolves classes pickled from a training script's __main__"""
+
+    def find_class(self, module, name):
+        if module == '__main__' and name == 'EpilepsyAnomalyDetector':
+            return EpilepsyAnomalyDetector
+        return super().find_class(module, name)
+
+
+def load_legacy_pickle(path):
+    """Load one of the legacy model pickles shipped with the app"""
+    with open(path, 'rb') as file:
+        return _LegacyUnpickler(file).load()
+
+
+class SignatureScoreBackend:
+    """Ensemble view of a pattern-signature model with an informative score
+
+    The model's own get_anomaly_scores is a similarity ratio that stays
+    within ~1e-5 of 0.5, which adds nothing when averaged with other
+    backends. This scores the margin instead: the calibrated probability
+    when a calibration has been fitted (see calibration.py), otherwise the
+    seizure proximity, which is above 0.5 exactly when the model predicts
+    seizure.
+    """
+
+    def __init__(self, model, calibration=None):
+        self.model = model
+        self.calibration = calibration
+
+    def get_anomaly_scores(self, X):
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.calibration is not None:
+            return self.calibration.predict_proba(decision_scores(X, self.model))
+        return seizure_proximity(X, self.model)
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+def load_default_backends():
+    """Load every model the ensemble can use, skipping the ones that fail"""
+    enhanced = EnhancedEpilepsyModel()
+    n_features = len(enhanced.seizure_signature)
+    errors = {}
+    try:
+        calibration = load_calibration()
+    except Exception as e:
+        calibration = None
+        errors['enhanced calibration'] = str(e)
+    backends = {'enhanced': SignatureScoreBackend(enhanced, calibration)}
+
+    for name, filename in [('legacy_ensemble', 'EE_model.pkl'),
+                           ('anomaly', 'EE_anomaly_model.pkl')]:
+        try:
+            model = load_legacy_pickle(os.path.join(BASE_DIR, filename))
+        except Exception as e:
+            errors[name] = str(e)
+            continue
+        # Some legacy models were fitted on the full scalp montage, not the
+        # eight channels the app collects
+        expected = getattr(model, 'n_features_in_', None)
+        if expected is not None and expected != n_features:
+            errors[name] = f"model expects {expected} features, app provides {n_features}"
+            continue
+        backends[name] = model
+
+    return backends, errors
+
+
+def backend_scores(model, X):
+    """Seizure score in [0, 1] for each row, whatever interface the model offers"""
+    if hasattr(model, 'get_anomaly_scores'):
+        return np.asarray(model.get_anomaly_scores(X), dtype=float)
+    if hasattr(model, 'predict_proba'):
+        return np.asarray(model.predict_proba(X), dtype=float)[:, 1]
+    return np.asarray(model.predict(X), dtype=float)
+
+
+class BackendStats:
+    """Thread-safe latency statistics for one ensemble backend"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.dropped = 0
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(seconds)
+            if error:
+                self.errors += 1
+
+    def record_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def summary(self):
+        """Return call counts and latency percentiles in milliseconds"""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000.0
+            summary = {'calls': self.calls, 'errors': self.errors, 'dropped': self.dropped}
+        if latencies.size:
+            summary.update({
+                'mean_ms': float(latencies.mean()),
+                'p50_ms': float(np.percentile(latencies, 50)),
+                'p95_ms': float(np.percentile(latencies, 95)),
+                'max_ms': float(latencies.max()),
+            })
+        return summary
+
+
+class EnsembleScorer:
+    """Fan a batch of EEG windows out to several models and combine their outputs
+
+    Backends run concurrently, each in its own small thread pool (NumPy and
+    sklearn release the GIL in their heavy loops), so the request latency is
+    that of the slowest backend that answers within the budget, not the sum
+    of all of them. Backends that miss the budget are dropped from that
+    request's vote and their pending calls are cancelled. A backend that
+    already has `workers_per_backend` calls running is skipped (and counted
+    as dropped) instead of queueing more work behind them, so one slow
+    backend cannot hold up the others.
+
+    With method='vote' the score is the fraction of backends voting
+    seizure. An exact tie is broken by the mean of the backends' scores
+    (seizure if it is above 0.5), so two disagreeing backends resolve
+    towards the more confident one.
+    """
+
+    def __init__(self, backends, method='vote', latency_budget=DEFAULT_LATENCY_BUDGET,
+                 workers_per_backend=DEFAULT_WORKERS_PER_BACKEND):
+        if method not in ('vote', 'average'):
+            raise ValueError(f"Unknown ensemble method: {method}")
+        if not backends:
+            raise ValueError("EnsembleScorer needs at least one backend")
+
+        self.backends = dict(backends)
+        self.method = method
+        self.latency_budget = latency_budget
+        self.workers_per_backend = workers_per_backend
+        self.stats = {name: BackendStats() for name in self.backends}
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=workers_per_backend,
+                                     thread_name_prefix=f'ensemble-{name}')
+            for name in self.backends
+        }
+        # Calls submitted to each backend that have not finished yet
+        self._in_flight = {name: 0 for name in self.backends}
+        self._lock = threading.Lock()
+
+    def _submit(self, name, X):
+        """Submit X to a backend, or return None if the backend is saturated"""
+        with self._lock:
+            if self._in_flight[name] >= self.workers_per_backend:
+                return None
+            self._in_flight[name] += 1
+        future = self._executors[name].submit(self._run_backend, name, X)
+        # Also runs when the call is cancelled
+        future.add_done_callback(lambda _: self._call_finished(name))
+        return future
+
+    def _call_finished(self, name):
+        with self._lock:
+            self._in_flight[name] -= 1
+
+    def _run_backend(self, name, X):
+        """Score X with one backend and record its latency"""
+        start = time.perf_counter()
+        try:
+            scores = backend_scores(self.backends[name], X)
+        except Exception:
+            self.stats[name].record(time.perf_counter() - start, error=True)
+            raise
+        self.stats[name].record(time.perf_counter() - start)
+        return scores
+
+    def score(self, X, latency_budget=None):
+        """Score a batch of windows with every backend that answers in time"""
+        X = np.array(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        budget = self.latency_budget if latency_budget is None else latency_budget
+
+        start = time.perf_counter()
+        futures = {}
+        dropped = []
+        for name in self.backends:
+            future = self._submit(name, X)
+            if future is None:
+                # Still busy with earlier requests
+                self.stats[name].record_drop()
+                dropped.append(name)
+            else:
+                futures[future] = name
+        done, not_done = wait(futures, timeout=budget) if futures else (set(), set())
+
+        backend_results = {}
+        failed = {}
+        for future in done:
+            name = futures[future]
+            try:
+                backend_results[name] = future.result()
+            except Exception as e:
+                failed[name] = str(e)
+
+        for future in not_done:
+            # Calls that have not started are cancelled; running ones finish
+            # in the background and still record their latency
+            future.cancel()
+            name = futures[future]
+            self.stats[name].record_drop()
+            dropped.append(name)
+
+        result = {
+            'predictions': None,
+            'scores': None,
+            'backend_scores': backend_results,
+            'backends_used': sorted(backend_results),
+            'backends_dropped': sorted(dropped),
+            'backends_failed': failed,
+            'elapsed_ms': (time.perf_counter() - start) * 1000.0,
+        }
+        if not backend_results:
+            return result
+
+        stacked = np.vstack([backend_results[name] for name in sorted(backend_results)])
+        mean_scores = stacked.mean(axis=0)
+        if self.method == 'vote':
+            # Fraction of backends voting seizure; majority wins and an exact
+            # tie goes to the mean score
+            scores = (stacked > 0.5).mean(axis=0)
+            predictions = np.where(scores == 0.5, mean_scores > 0.5, scores > 0.5)
+        else:
+            scores = mean_scores
+            predictions = scores > 0.5
+
+        result['scores'] = scores
+        result['predictions'] = predictions.astype(int)
+        return result
+
+    def timing_stats(self):
+        """Per-backend latency statistics"""
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
@@ -0,0 +1,167 @@
+import numpy as np
+
+from model_definitions import pattern_distances
+
+# Default minimum length of the per-stream history, in windows
+DEFAULT_HISTORY = 120
+# Default prediction horizon in seconds
+DEFAULT_HORIZON = 300
+
+
+def seizure_proximity(X, model):
+    """Position of each window between the normal (0) and seizure (1) signatures
+
+    Unlike the similarity ratio, this does not collapse to ~0.5 for the
+    1e-5-scale amplitudes of real recordings.
+    """
+    seizure_distance = pattern_distances(X, model.seizure_signature, model.feature_importance)
+    normal_distance = pattern_distances(X, model.normal_signature, model.feature_importance)
+    total = seizure_distance + normal_distance
+    return np.where(total > 0, normal_distance / np.where(total > 0, total, 1.0), 0.5)
+
+
+class PreictalRiskTracker:
+    """Preictal-risk score for one EEG stream from a fixed-size window history
+
+    Window features are kept in a ring array, so memory and the cost of each
+    update are constant however long the stream runs. Each update computes,
+    vectorized over the history:
+
+    - the level and least-squares slope of the seizure proximity score,
+      extrapolated over the prediction horizon;
+    - per-channel lag-1 autocorrelation relative to a baseline, which rises
+      ahead of seizures ("critical slowing down");
+    - per-channel slopes, reported for display.
+
+    The trend is never extrapolated further ahead than the history it was
+    fitted on, so the history holds at least `horizon_seconds` of windows:
+    once that much has been seen, the full horizon is used. Until then
+    every horizon longer than the recorded history gives the same risk.
+
+    The risk combines these with a logistic link. The weights are heuristic
+    defaults and should be fitted on labelled preictal data.
+    """
+
+    def __init__(self, model, history=DEFAULT_HISTORY, window_seconds=1.0,
+                 horizon_seconds=DEFAULT_HORIZON, level_windows=5,
+                 steepness=8.0, autocorr_weight=1.5, autocorr_baseline=0.5, min_windows=3):
+        self.model = model
+        self.window_seconds = window_seconds
+        self.horizon_seconds = horizon_seconds
+        # Long enough to extrapolate over the whole horizon
+        self.history = max(history, int(np.ceil(self.horizon_windows)))
+        self.level_windows = level_windows
+        self.steepness = steepness
+        self.autocorr_weight = autocorr_weight
+        self.autocorr_baseline = autocorr_baseline
+        self.min_windows = min_windows
+
+        n_features = len(model.seizure_signature)
+        self._windows = np.zeros((self.history, n_features))
+        self._proximity = np.zeros(self.history)
+        self._next = 0
+        self.count = 0
+
+    @property
+    def horizon_windows(self):
+        return self.horizon_seconds / self.window_seconds
+
+    def _ordered(self):
+        """History oldest-first (bounded by `history`, so constant cost)"""
+        n = min(self.count, self.history)
+        order = (self._next - n + np.arange(n)) % self.history
+        return self._windows[order], self._proximity[order]
+
+    def update(self, window):
+        """Add one window and return the current risk features"""
+        window = np.asarray(window, dtype=float).reshape(1, -1)
+        n_features = self._windows.shape[1]
+        row = np.zeros(n_features)
+        m = min(window.shape[1], n_features)
+        row[:m] = window[0, :m]
+
+        self._windows[self._next] = row
+        self._proximity[self._next] = seizure_proximity(row.reshape(1, -1), self.model)[0]
+        self._next = (self._next + 1) % self.history
+        self.count += 1
+
+        return self.features()
+
+    def features(self):
+        """Trend features and preictal risk for the current history"""
+        windows, proximity = self._ordered()
+        n = len(proximity)
+        if n == 0:
+            return None
+
+        level = float(proximity[-self.level_windows:].mean())
+        result = {
+            'windows': n,
+            'proximity': float(proximity[-1]),
+            'level': level,
+            'horizon_seconds': self.horizon_seconds,
+        }
+        if n < self.min_windows:
+            # Not enough history for trends yet; fall back to the current level
+            result.update({'proximity_slope': 0.0, 'projected': level, 'autocorrelation': 0.0,
+                           'channel_slopes': np.zeros(windows.shape[1]),
+                           'risk': self._risk(level, self.autocorr_baseline), 'ready': False})
+            return result
+
+        # Least-squares slopes against window index for every series at once
+        t = np.arange(n) - (n - 1) / 2.0
+        t_var = (t * t).sum()
+        series = np.column_stack([windows, proximity])
+        centred = series - series.mean(axis=0)
+        slopes = (t @ centred) / t_var
+
+        # Lag-1 autocorrelation per channel (flat channels count as 0)
+        variance = (centred[:, :-1] ** 2).sum(axis=0)
+        lagged = (centred[1:, :-1] * centred[:-1, :-1]).sum(axis=0)
+        autocorr = np.divide(lagged, variance, out=np.zeros_like(lagged), where=variance > 0)
+
+        # Extrapolate the trend over the horizon, but never further ahead
+        # than the history it was fitted on
+        proximity_slope = float(slopes[-1])
+        lead = min(self.horizon_windows, n)
+        projected = float(np.clip(level + proximity_slope * lead, 0.0, 1.0))
+        mean_autocorr = float(autocorr.mean())
+
+        result.update({
+            'proximity_slope': proximity_slope,
+            'projected': projected,
+            'autocorrelation': mean_autocorr,
+            'channel_slopes': slopes[:-1],
+            'risk': self._risk(max(level, projected), mean_autocorr),
+            'ready': True,
+        })
+        return result
+
+    def _risk(self, proximity, autocorr):
+        z = (self.steepness * (proximity - 0.5)
+             + self.autocorr_weight * (autocorr - self.autocorr_baseline))
+        return float(1.0 / (1.0 + np.exp(-z)))
+
+    def reset(self):
+        self._next = 0
+        self.count = 0
+
+
+class HorizonPredictor:
+    """Preictal-risk trackers for many concurrently monitored streams"""
+
+    def __init__(self, model, **tracker_options):
+        self.model = model
+        self.tracker_options = tracker_options
+        self.trackers = {}
+
+    def update(self, stream_id, window):
+        """Feed one window for a stream and return its risk features"""
+        tracker = self.trackers.get(stream_id)
+        if tracker is None:
+            tracker = PreictalRiskTracker(self.model, **self.tracker_options)
+            self.trackers[stream_id] = tracker
+        return tracker.update(window)
+
+    def drop(self, stream_id):
+        self.trackers.pop(stream_id, None)
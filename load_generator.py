@@ -0,0 +1,273 @@
+import argparse
+import time
+
+import numpy as np
+
+from channels import CHANNEL_MAX, CHANNEL_MIN, CHANNEL_NAMES
+from shared_plane import attach_from_environment
+
+DEFAULT_BLOCK_ROWS = 65536
+# Rows of precomputed background noise (16 MB of float64)
+DEFAULT_POOL_ROWS = 262144
+
+
+def _with_eighth_channel(rows):
+    """values.py has 7 channels; the 8th (T8-P8-1) repeats T8-P8"""
+    rows = np.array(rows, dtype=float)
+    return np.hstack([rows, rows[:, -1:]])
+
+
+def compute_reference_data():
+    """Reference data the synthetic signal is modeled on, derived from values.py"""
+    from values import no_seiz, seiz
+    normal = _with_eighth_channel(no_seiz)
+    return {
+        'seizure_template': _with_eighth_channel(seiz),
+        'normal_mean': normal.mean(axis=0),
+        'normal_std': normal.std(axis=0),
+        'channel_min': CHANNEL_MIN,
+        'channel_max': CHANNEL_MAX,
+    }
+
+
+_reference = None
+# Keeps the mapping behind shared reference arrays open
+_reference_plane = None
+
+
+def reference_data():
+    """Reference arrays, read from the shared plane when one is attached
+
+    Without a plane they are computed from values.py once per process.
+    """
+    global _reference, _reference_plane
+    if _reference is None:
+        try:
+            _reference_plane = attach_from_environment()
+        except Exception:
+            _reference_plane = None
+        if _reference_plane is not None:
+            _reference = _reference_plane.arrays
+        else:
+            _reference = compute_reference_data()
+    return _reference
+
+
+class SyntheticEEGGenerator:
+    """Fast synthetic multi-channel EEG for load and soak testing
+
+    Background activity is smoothed Gaussian noise with the per-channel mean
+    and spread of values.no_seiz; seizure-like segments are the values.seiz
+    recording resampled to a random length, with noise on top. Everything is
+    generated a block at a time with vectorized NumPy, and values are clipped
+    to the channel ranges the prediction page accepts. Labels (1 = injected
+    seizure) are returned alongside each block.
+
+    Drawing fresh Gaussian noise dominates the cost, so by default the
+    background is cut from a precomputed pool of smoothed noise at a random
+    offset per block, with a small random per-channel drift on top; this
+    runs at memory-copy speed. Pass pool_rows=None for fresh noise in every
+    block.
+    """
+
+    def __init__(self, seed=None, seizure_fraction=0.02, seizure_length=(25, 200),
+                 smoothing=8, noise_scale=0.25, pool_rows=DEFAULT_POOL_ROWS,
+                 dtype=np.float64):
+        if smoothing < 1:
+            raise ValueError("smoothing must be at least 1")
+        self.rng = np.random.default_rng(seed)
+        self.seizure_fraction = seizure_fraction
+        self.seizure_length = seizure_length
+        self.smoothing = smoothing
+        self.noise_scale = noise_scale
+        self.dtype = dtype
+
+        reference = reference_data()
+        self._template = reference['seizure_template']
+        self._mean = reference['normal_mean'].astype(dtype)
+        self._std = reference['normal_std'].astype(dtype)
+        self._min = reference['channel_min'].astype(dtype)
+        self._max = reference['channel_max'].astype(dtype)
+        # Carried between blocks so the signal is continuous across them
+        self._noise_tail = np.zeros((smoothing - 1, len(CHANNEL_NAMES)), dtype=dtype)
+        self._segment_remaining = None
+
+        self._pool = None
+        if pool_rows is not None:
+            self._pool = self._fresh_background(pool_rows)
+
+    def _background(self, n_rows):
+        """Background activity for the next block"""
+        if self._pool is None:
+            return self._fresh_background(n_rows)
+
+        # Copy from the pool at a random offset, wrapping around its end
+        X = np.empty((n_rows, len(CHANNEL_NAMES)), dtype=self.dtype)
+        filled = 0
+        offset = int(self.rng.integers(len(self._pool)))
+        while filled < n_rows:
+            n = min(n_rows - filled, len(self._pool) - offset)
+            X[filled:filled + n] = self._pool[offset:offset + n]
+            filled += n
+            offset = 0
+        X += self.rng.standard_normal(len(CHANNEL_NAMES)).astype(self.dtype) * (self._std * self.noise_scale)
+        return X
+
+    def _fresh_background(self, n_rows):
+        """Moving-average-smoothed noise, continuous with the previous block"""
+        white = self.rng.standard_normal((n_rows, len(CHANNEL_NAMES)), dtype=self.dtype)
+        padded = np.concatenate([self._noise_tail, white])
+        self._noise_tail = padded[n_rows:]
+
+        # Moving average via cumulative sums; rescale to unit variance
+        csum = np.cumsum(padded, axis=0, dtype=self.dtype)
+        smoothed = csum[self.smoothing - 1:].copy()
+        smoothed[1:] -= csum[:n_rows - 1]
+        smoothed *= self._std / np.sqrt(self.smoothing)
+        smoothed += self._mean
+        return smoothed
+
+    def _seizure_segment(self, length):
+        """values.seiz resampled to `length` rows with added noise"""
+        template = self._template
+        position = np.linspace(0, len(template) - 1, length)
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, len(template) - 1)
+        frac = (position - lower)[:, None]
+        segment = template[lower] * (1 - frac) + template[upper] * frac
+        segment += self.rng.standard_normal(segment.shape) * (self._std * self.noise_scale)
+        return segment.astype(self.dtype)
+
+    def block(self, n_rows=DEFAULT_BLOCK_ROWS):
+        """Generate the next (X, labels) block of n_rows windows"""
+        X = self._background(n_rows)
+        labels = np.zeros(n_rows, dtype=np.int8)
+
+        position = 0
+        # Finish a segment started in the previous block
+        if self._segment_remaining is not None:
+            segment = self._segment_remaining
+            n = min(len(segment), n_rows)
+            X[:n] = segment[:n]
+            labels[:n] = 1
+            self._segment_remaining = segment[n:] if n < len(segment) else None
+            position = n
+
+        # Segment starts arrive as a Poisson process sized to seizure_fraction
+        mean_length = sum(self.seizure_length) / 2
+        n_events = self.rng.poisson(self.seizure_fraction * (n_rows - position) / mean_length)
+        starts = np.sort(self.rng.integers(position, n_rows, n_events)) if n_events else []
+        for start in starts:
+            if start < position:
+                continue  # overlaps the previous segment
+            length = int(self.rng.integers(self.seizure_length[0], self.seizure_length[1] + 1))
+            segment = self._seizure_segment(length)
+            n = min(length, n_rows - start)
+            X[start:start + n] = segment[:n]
+            labels[start:start + n] = 1
+            position = start + n
+            if n < length:
+                self._segment_remaining = segment[n:]
+
+        np.clip(X, self._min, self._max, out=X)
+        return X, labels
+
+    def blocks(self, total_rows=None, block_rows=DEFAULT_BLOCK_ROWS):
+        """Yield blocks until total_rows windows were produced (forever if None)"""
+        produced = 0
+        while total_rows is None or produced < total_rows:
+            n = block_rows if total_rows is None else min(block_rows, total_rows - produced)
+            yield self.block(n)
+            produced += n
+
+
+def feed(generator, target, rate=None, total_rows=None, duration=None,
+         block_rows=DEFAULT_BLOCK_ROWS):
+    """Drive a prediction entry point with synthetic load
+
+    target is called as target(X, labels) for every block. rate is the
+    offered load in windows per second (None = as fast as possible); the
+    feeder sleeps between blocks to hold it. Stops after total_rows windows
+    or duration seconds. Returns throughput and per-block latency stats.
+    """
+    if total_rows is None and duration is None:
+        raise ValueError("feed() needs total_rows or duration")
+
+    latencies = []
+    rows = 0
+    start = time.perf_counter()
+    for X, labels in generator.blocks(total_rows, block_rows):
+        call_start = time.perf_counter()
+        target(X, labels)
+        latencies.append(time.perf_counter() - call_start)
+        rows += len(X)
+
+        elapsed = time.perf_counter() - start
+        if duration is not None and elapsed >= duration:
+            break
+        if rate is not None:
+            # Sleep until this block is due at the requested rate
+            ahead = rows / rate - elapsed
+            if ahead > 0:
+                time.sleep(ahead)
+
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000.0
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_s': rows / elapsed if elapsed > 0 else float('inf'),
+        'offered_rows_per_s': rate,
+        'block_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'block_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+        'block_max_ms': float(latencies.max()) if len(latencies) else None,
+    }
+
+
+def _batch_target():
+    from batch_scoring import predict_batch
+    from model_definitions import EnhancedEpilepsyModel
+    model = EnhancedEpilepsyModel()
+    return lambda X, labels: predict_batch(X, model)
+
+
+def _ensemble_target():
+    from ensemble import EnsembleScorer, load_default_backends
+    backends, _ = load_default_backends()
+    scorer = EnsembleScorer(backends, latency_budget=10.0)
+    return lambda X, labels: scorer.score(X)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic EEG load generator")
+    parser.add_argument('--rows', type=int, default=10_000_000, help="windows to generate")
+    parser.add_argument('--duration', type=float, default=None, help="stop after this many seconds")
+    parser.add_argument('--rate', type=float, default=None, help="windows per second (default: unthrottled)")
+    parser.add_argument('--block', type=int, default=DEFAULT_BLOCK_ROWS, help="windows per block")
+    parser.add_argument('--target', choices=['none', 'batch', 'ensemble'], default='batch',
+                        help="prediction entry point to drive")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--float32', action='store_true', help="generate float32 data")
+    args = parser.parse_args()
+
+    generator = SyntheticEEGGenerator(seed=args.seed,
+                                      dtype=np.float32 if args.float32 else np.float64)
+    if args.target == 'batch':
+        target = _batch_target()
+    elif args.target == 'ensemble':
+        target = _ensemble_target()
+    else:
+        target = lambda X, labels: None
+
+    stats = feed(generator, target, rate=args.rate, total_rows=args.rows,
+                 duration=args.duration, block_rows=args.block)
+    bytes_per_row = len(CHANNEL_NAMES) * np.dtype(generator.dtype).itemsize
+    print(f"rows: {stats['rows']:,} in {stats['seconds']:.2f} s")
+    print(f"throughput: {stats['rows_per_s']:,.0f} windows/s "
+          f"({stats['rows_per_s'] * bytes_per_row / 1e9:.2f} GB/s)")
+    print(f"block latency: p50 {stats['block_p50_ms']:.2f} ms, "
+          f"p99 {stats['block_p99_ms']:.2f} ms, max {stats['block_max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
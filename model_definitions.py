@@ -1,16 +1,48 @@
 import numpy as np
 from sklearn.base import BaseEstimator, ClassifierMixin
 
+from signatures import FEATURE_IMPORTANCE, NORMAL_SIGNATURE, SEIZURE_SIGNATURE
+
+
+def pattern_differences(X, pattern, feature_importance):
+    """Per-channel weighted absolute difference between each window and a pattern"""
+    X = np.asarray(X, dtype=float)
+    n = min(X.shape[1], len(pattern))
+    weights = feature_importance[:n]
+    return np.abs(X[:, :n] * weights - pattern[:n] * weights)
+
+
+def pattern_distances(X, pattern, feature_importance):
+    """Vectorized weighted absolute difference between each window and a pattern"""
+    return pattern_differences(X, pattern, feature_importance).sum(axis=1)
+
+
+def channel_contributions(seizure_differences, normal_differences):
+    """How much each channel pushed each window towards the seizure pattern
+
+    Positive values favour seizure, negative values favour normal. The row
+    sums are normal distance minus seizure distance, so a window is
+    classified as seizure exactly when its contributions sum above zero.
+    """
+    return normal_differences - seizure_differences
+
+
+def pattern_similarities(X, pattern, feature_importance):
+    """Vectorized pattern similarity for a 2D batch of EEG windows"""
+    # Same metric as _calculate_pattern_similarity, computed for all rows at once
+    return 1.0 / (1.0 + pattern_distances(X, pattern, feature_importance))
+
+
 class EnhancedEpilepsyModel(BaseEstimator, ClassifierMixin):
     """Enhanced epilepsy prediction model"""
     
     def __init__(self, threshold=0.00004):
         self.threshold = threshold
         # Feature importance optimized for seizure detection
-        self.feature_importance = np.array([0.25, 0.2, 0.1, 0.15, 0.15, 0.05, 0.1, 0.0])
+        self.feature_importance = FEATURE_IMPORTANCE.copy()
         # Define pattern signatures for comparison
-        self.seizure_signature = np.array([0.000031, 0.000027, 0.000012, 0.000056, 0.000041, -0.000018, 0.000052, 0.000052])
-        self.normal_signature = np.array([-0.000053, 0.000023, 0.000078, 0.000123, 0.000118, -0.000047, -0.000061, -0.000061])
+        self.seizure_signature = SEIZURE_SIGNATURE.copy()
+        self.normal_signature = NORMAL_SIGNATURE.copy()
         
     def predict(self, X):
         """Predict seizure occurrence based on EEG data using pattern similarity"""
@@ -18,19 +50,12 @@ class EnhancedEpilepsyModel(BaseEstimator, ClassifierMixin):
         if X.ndim == 1:
             X = X.reshape(1, -1)
         
-        predictions = []
-        for i in range(X.shape[0]):
-            # Calculate similarity to known patterns
-            seizure_similarity = self._calculate_pattern_similarity(X[i], self.seizure_signature)
-            normal_similarity = self._calculate_pattern_similarity(X[i], self.normal_signature)
-            
-            # If the input is more similar to the seizure pattern, classify as seizure
-            if seizure_similarity > normal_similarity:
-                predictions.append(1)  # Seizure
-            else:
-                predictions.append(0)  # Normal
+        # Calculate similarity to known patterns for the whole batch
+        seizure_similarity = pattern_similarities(X, self.seizure_signature, self.feature_importance)
+        normal_similarity = pattern_similarities(X, self.normal_signature, self.feature_importance)
         
-        return np.array(predictions)
+        # If the input is more similar to the seizure pattern, classify as seizure
+        return (seizure_similarity > normal_similarity).astype(int)
     
     def _calculate_pattern_similarity(self, data, pattern):
         """Calculate similarity between input data and a reference pattern"""
@@ -53,18 +78,54 @@ class EnhancedEpilepsyModel(BaseEstimator, ClassifierMixin):
         if X.ndim == 1:
             X = X.reshape(1, -1)
             
-        scores = []
-        for i in range(X.shape[0]):
-            # Calculate similarity to known patterns
-            seizure_similarity = self._calculate_pattern_similarity(X[i], self.seizure_signature)
-            normal_similarity = self._calculate_pattern_similarity(X[i], self.normal_signature)
-            
-            # Score based on relative similarity to seizure pattern
-            # Higher score means higher likelihood of seizure
-            if seizure_similarity + normal_similarity > 0:
-                score = seizure_similarity / (seizure_similarity + normal_similarity)
-                scores.append(score)
-            else:
-                scores.append(0.5)  # Default if similarities are both zero
+        # Calculate similarity to known patterns for the whole batch
+        seizure_similarity = pattern_similarities(X, self.seizure_signature, self.feature_importance)
+        normal_similarity = pattern_similarities(X, self.normal_signature, self.feature_importance)
         
-        return np.array(scores)
\ No newline at end of file
+        # Score based on relative similarity to seizure pattern
+        # Higher score means higher likelihood of seizure
+        total = seizure_similarity + normal_similarity
+        safe_total = np.where(total > 0, total, 1.0)
+        # Default to 0.5 if similarities are both zero
+        return np.where(total > 0, seizure_similarity / safe_total, 0.5)
+
+
+class EpilepsyAnomalyDetector:
+    """Unsupervised detector stored in EE_anomaly_model.pkl
+
+    The pickle was written from a training script's __main__, so the class is
+    redefined here and mapped in by the loaders. Each sub-detector flags a
+    window as anomalous when its score falls below the stored threshold.
+    """
+    
+    detector_names = ('iso_forest', 'one_class_svm', 'lof')
+    
+    @property
+    def n_features_in_(self):
+        """Number of input features the sub-detectors were fitted on"""
+        return getattr(getattr(self, 'iso_forest', None), 'n_features_in_', None)
+    
+    def _detector_votes(self, X):
+        """Return a (n_detectors, n_samples) array of anomaly votes"""
+        votes = []
+        for name in self.detector_names:
+            detector = getattr(self, name, None)
+            threshold = getattr(self, f'{name}_threshold', None)
+            if detector is None or threshold is None:
+                continue
+            votes.append(detector.score_samples(X) < threshold)
+        return np.array(votes)
+    
+    def get_anomaly_scores(self, X):
+        """Fraction of sub-detectors that flag each window as anomalous"""
+        X = np.array(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        votes = self._detector_votes(X)
+        if votes.size == 0:
+            return np.full(X.shape[0], 0.5)
+        return votes.mean(axis=0)
+    
+    def predict(self, X):
+        """Majority vote of the sub-detectors (1 = anomalous/seizure)"""
+        return (self.get_anomaly_scores(X) > 0.5).astype(int)
@@ -0,0 +1,231 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bulk_import import DEFAULT_CHUNK_ROWS, EDF_SUPPORT, EDF_UNIT_SCALE
+from channels import CHANNEL_NAMES
+
+if EDF_SUPPORT:
+    import pyedflib
+
+# Reference suffixes and prefixes stripped from referential channel labels,
+# e.g. "EEG FP1-REF" -> "FP1"
+_REFERENCE_SUFFIXES = ('-REF', '-LE', '-AR', '-AVG')
+_LABEL_PREFIXES = ('EEG ',)
+
+
+def normalize_electrode(label):
+    """Electrode name of a referential channel label"""
+    name = str(label).strip().upper()
+    for prefix in _LABEL_PREFIXES:
+        if name.startswith(prefix):
+            name = name[len(prefix):].strip()
+    for suffix in _REFERENCE_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def parse_derivation(name):
+    """('FP1', 'F7') for 'FP1-F7'; a trailing index as in 'T8-P8-1' is ignored"""
+    parts = name.upper().split('-')
+    if len(parts) < 2:
+        raise ValueError(f"Not a bipolar derivation: {name}")
+    return parts[0], parts[1]
+
+
+class Montage:
+    """Referential-to-bipolar conversion as a matrix product
+
+    Each derivation is anode minus cathode, so the montage is an
+    (n_electrodes, n_derivations) matrix of +1/-1 entries and a block of
+    samples converts with one matmul. Derivations may repeat, as T8-P8-1
+    repeats T8-P8 for the prediction page.
+    """
+
+    def __init__(self, derivations=None, names=None, dtype=np.float64):
+        derivations = CHANNEL_NAMES if derivations is None else derivations
+        if isinstance(derivations, str):
+            derivations = [d.strip() for d in derivations.split(',') if d.strip()]
+        self.pairs = [parse_derivation(d) if isinstance(d, str) else tuple(d) for d in derivations]
+        self.names = list(names) if names is not None else [
+            d if isinstance(d, str) else f"{d[0]}-{d[1]}" for d in derivations]
+        self.dtype = dtype
+
+        # Electrodes in first-use order; these are the input columns
+        self.electrodes = []
+        for anode, cathode in self.pairs:
+            for electrode in (anode, cathode):
+                if electrode not in self.electrodes:
+                    self.electrodes.append(electrode)
+
+        self.matrix = np.zeros((len(self.electrodes), len(self.pairs)), dtype=dtype)
+        for j, (anode, cathode) in enumerate(self.pairs):
+            self.matrix[self.electrodes.index(anode), j] += 1.0
+            self.matrix[self.electrodes.index(cathode), j] -= 1.0
+
+    def select_columns(self, labels):
+        """Input labels for each electrode in montage order, or None if any is missing"""
+        by_electrode = {}
+        for label in labels:
+            by_electrode.setdefault(normalize_electrode(label), label)
+        if not all(electrode in by_electrode for electrode in self.electrodes):
+            return None
+        return [by_electrode[electrode] for electrode in self.electrodes]
+
+    def apply(self, X, out=None):
+        """Bipolar derivations of a (n_samples, n_electrodes) block"""
+        X = np.asarray(X, dtype=self.dtype)
+        if out is not None:
+            out = out[:len(X)]
+        return np.matmul(X, self.matrix, out=out)
+
+
+DEFAULT_MONTAGE = Montage()
+
+
+class MontageStage:
+    """Converts a stream of referential blocks, reusing one output buffer
+
+    Each yielded array is a view of the stage's buffer and is overwritten
+    by the next block; copy it to keep it. Blocks larger than the buffer
+    are converted in buffer-sized pieces.
+    """
+
+    def __init__(self, montage=DEFAULT_MONTAGE, block_rows=DEFAULT_CHUNK_ROWS):
+        self.montage = montage
+        self.block_rows = block_rows
+        self._out = np.empty((block_rows, len(montage.pairs)), dtype=montage.dtype)
+
+    def convert(self, chunks):
+        for chunk in chunks:
+            for start in range(0, len(chunk), self.block_rows):
+                block = chunk[start:start + self.block_rows]
+                yield self.montage.apply(block, out=self._out)
+
+
+def iter_referential_csv(path, montage=DEFAULT_MONTAGE, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (n_rows, n_electrodes) blocks of a referential CSV in montage order"""
+    header = pd.read_csv(path, nrows=0)
+    if hasattr(path, 'seek'):
+        path.seek(0)
+    columns = montage.select_columns(header.columns)
+    if columns is None:
+        raise ValueError(f"Recording lacks electrodes for the montage: {', '.join(montage.electrodes)}")
+    for chunk in pd.read_csv(path, usecols=sorted(set(columns), key=list(header.columns).index),
+                             chunksize=chunk_rows):
+        yield chunk[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def iter_referential_edf(path, montage=DEFAULT_MONTAGE, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (n_rows, n_electrodes) blocks, in volts, of a referential EDF recording"""
+    if not EDF_SUPPORT:
+        raise ImportError("EDF import requires the pyedflib package")
+
+    with pyedflib.EdfReader(path) as reader:
+        labels = reader.getSignalLabels()
+        columns = montage.select_columns(labels)
+        if columns is None:
+            raise ValueError(f"Recording lacks electrodes for the montage: {', '.join(montage.electrodes)}")
+
+        indices = [labels.index(label) for label in columns]
+        scales = [EDF_UNIT_SCALE.get(reader.getPhysicalDimension(i).strip().lower(), 1.0)
+                  for i in indices]
+        n_samples = min(reader.getNSamples()[i] for i in indices)
+
+        # The input buffer is reused too; consumers only see the montage output
+        buffer = np.empty((chunk_rows, len(indices)))
+        for start in range(0, n_samples, chunk_rows):
+            n = min(chunk_rows, n_samples - start)
+            for j, (i, scale) in enumerate(zip(indices, scales)):
+                buffer[:n, j] = reader.readSignal(i, start, n) * scale
+            yield buffer[:n]
+
+
+def iter_referential(path, montage=DEFAULT_MONTAGE, chunk_rows=DEFAULT_CHUNK_ROWS):
+    if str(path).lower().endswith('.edf'):
+        return iter_referential_edf(path, montage, chunk_rows)
+    return iter_referential_csv(path, montage, chunk_rows)
+
+
+def _convert_one(path, montage, consumer, chunk_rows):
+    start = time.perf_counter()
+    rows = 0
+    stage = MontageStage(montage, chunk_rows)
+    for block in stage.convert(iter_referential(path, montage, chunk_rows)):
+        consumer(path, block)
+        rows += len(block)
+    elapsed = time.perf_counter() - start
+    return {'path': path, 'rows': rows, 'elapsed_s': elapsed,
+            'rows_per_s': rows / elapsed if elapsed > 0 else float('inf')}
+
+
+def convert_recordings(paths, consumer, montage=DEFAULT_MONTAGE, max_workers=None,
+                       chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Convert many recordings in parallel, one worker thread per recording
+
+    consumer(path, block) is called from the worker thread with each block
+    of bipolar derivations (a reused buffer; copy to keep). The matmul and
+    most of the file parsing release the GIL, so recordings convert
+    concurrently. Returns per-recording row counts and throughput.
+    """
+    max_workers = max_workers or min(len(paths), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='montage') as pool:
+        futures = [pool.submit(_convert_one, path, montage, consumer, chunk_rows) for path in paths]
+        return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert referential EEG recordings to the app's bipolar channels")
+    parser.add_argument('recordings', nargs='+', help="referential CSV or EDF recordings")
+    parser.add_argument('--montage', default=None,
+                        help="comma-separated derivations (default: the prediction page's channels)")
+    parser.add_argument('--workers', type=int, default=None, help="recordings converted in parallel")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--output-dir', default=None, help="write <name>_bipolar.csv files here")
+    parser.add_argument('--score', action='store_true', help="also batch-score the converted windows")
+    args = parser.parse_args()
+
+    montage = DEFAULT_MONTAGE if args.montage is None else Montage(args.montage)
+    seizures = {path: 0 for path in args.recordings}
+    model = None
+    if args.score:
+        from batch_scoring import predict_batch
+        from shared_plane import default_model
+        model = default_model()
+
+    def consumer(path, block):
+        if model is not None:
+            predictions, _ = predict_batch(block, model)
+            seizures[path] += int(predictions.sum())
+        if args.output_dir:
+            name = os.path.splitext(os.path.basename(path))[0]
+            output = os.path.join(args.output_dir, f"{name}_bipolar.csv")
+            first = not os.path.exists(output) or os.path.getsize(output) == 0
+            pd.DataFrame(block, columns=montage.names).to_csv(output, mode='a', header=first, index=False)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for path in args.recordings:
+            name = os.path.splitext(os.path.basename(path))[0]
+            # Start each output afresh
+            open(os.path.join(args.output_dir, f"{name}_bipolar.csv"), 'w').close()
+
+    start = time.perf_counter()
+    results = convert_recordings(args.recordings, consumer, montage, args.workers, args.chunk_rows)
+    elapsed = time.perf_counter() - start
+    for result in results:
+        line = f"{result['path']}: {result['rows']:,} rows at {result['rows_per_s']:,.0f} rows/s"
+        if args.score:
+            line += f", {seizures[result['path']]:,} seizure windows"
+        print(line)
+    total = sum(result['rows'] for result in results)
+    print(f"total: {total:,} rows in {elapsed:.2f} s ({total / elapsed if elapsed > 0 else 0:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ import os
 # Add the current directory to path to ensure imports work
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from channels import CHANNEL_NAMES, EEG_CHANNELS
+from signatures import FEATURE_IMPORTANCE, NORMAL_SIGNATURE, SEIZURE_SIGNATURE
+
 # Try to import model definitions with proper error handling
 try:
     from model_definitions import EnhancedEpilepsyModel
@@ -16,15 +19,67 @@ except ImportError as e:
     st.warning(f"Model definition import failed: {str(e)}")
     MODEL_IMPORT_SUCCESS = False
 
+try:
+    from ensemble import EnsembleScorer, load_default_backends
+    ENSEMBLE_IMPORT_SUCCESS = True
+except ImportError:
+    ENSEMBLE_IMPORT_SUCCESS = False
+
+try:
+    from batch_scoring import predict_batch
+    from bulk_import import EDF_SUPPORT, iter_upload_chunks, results_to_csv, run_bulk_prediction
+    BULK_IMPORT_SUCCESS = True
+except ImportError:
+    BULK_IMPORT_SUCCESS = False
+
+try:
+    from patient_models import PatientSignatureStore
+    PATIENT_MODELS_SUCCESS = True
+except ImportError:
+    PATIENT_MODELS_SUCCESS = False
+
+try:
+    from horizon import PreictalRiskTracker
+    HORIZON_IMPORT_SUCCESS = True
+except ImportError:
+    HORIZON_IMPORT_SUCCESS = False
+
+try:
+    from shared_plane import attach_from_environment
+    SHARED_PLANE_SUCCESS = True
+except ImportError:
+    SHARED_PLANE_SUCCESS = False
+
+try:
+    from calibration import DEFAULT_CALIBRATION_PATH, Calibration, decision_scores
+    CALIBRATION_IMPORT_SUCCESS = True
+except ImportError:
+    CALIBRATION_IMPORT_SUCCESS = False
+
+try:
+    from alerts import get_alert_dispatcher, make_alert
+    ALERTS_IMPORT_SUCCESS = True
+except ImportError:
+    ALERTS_IMPORT_SUCCESS = False
+
+# Fragments rerun only their own widgets; older Streamlit releases lack them
+fragment = getattr(st, 'fragment', getattr(st, 'experimental_fragment', lambda func: func))
+
+try:
+    from prediction_log import get_prediction_log
+    PREDICTION_LOG_SUCCESS = True
+except ImportError:
+    PREDICTION_LOG_SUCCESS = False
+
 # Define the fallback model class
 class SimpleFallbackModel:
     """Simple rule-based model when no trained model is available"""
     
     def __init__(self):
-        # Define known pattern signatures
-        self.seizure_signature = np.array([0.000031, 0.000027, 0.000012, 0.000056, 0.000041, -0.000018, 0.000052, 0.000052])
-        self.normal_signature = np.array([-0.000053, 0.000023, 0.000078, 0.000123, 0.000118, -0.000047, -0.000061, -0.000061])
-        self.feature_importance = np.array([0.25, 0.2, 0.1, 0.15, 0.15, 0.05, 0.1, 0.0])
+        # Known pattern signatures shared with the enhanced model
+        self.seizure_signature = SEIZURE_SIGNATURE.copy()
+        self.normal_signature = NORMAL_SIGNATURE.copy()
+        self.feature_importance = FEATURE_IMPORTANCE.copy()
         self.threshold = 0.5  # Similarity threshold
     
     def predict(self, X):
@@ -83,11 +138,29 @@ class SimpleFallbackModel:
         
         return np.array(scores)
 
+@st.cache_resource(show_spinner=False)
 def load_model():
-    """Robust model loading with fallbacks and attribute verification"""
+    """Robust model loading with fallbacks and attribute verification
+
+    Cached per server process, so reruns and new sessions reuse the model.
+    """
     model = None
     model_info = None
     
+    # Multi-worker deployments publish the model once (see shared_plane.py);
+    # attaching maps it read-only without deserializing anything
+    if SHARED_PLANE_SUCCESS:
+        try:
+            plane = attach_from_environment()
+            if plane is not None:
+                model_info = {
+                    'performance_metrics': {},
+                    'type': 'Enhanced model (shared memory plane)'
+                }
+                return plane.model(), model_info
+        except Exception as e:
+            st.warning(f"Shared model plane unavailable: {str(e)}")
+    
     try:
         # First try: Standard pickle load
         with open('enhanced_epilepsy_model.pkl', 'rb') as file:
@@ -159,11 +232,11 @@ def ensure_model_attributes(model):
     
     # Add seizure and normal signatures if missing
     if not hasattr(model, 'seizure_signature'):
-        model.seizure_signature = np.array([0.000031, 0.000027, 0.000012, 0.000056, 0.000041, -0.000018, 0.000052, 0.000052])
+        model.seizure_signature = SEIZURE_SIGNATURE.copy()
         #st.info("Added missing seizure_signature attribute to model.")
     
     if not hasattr(model, 'normal_signature'):
-        model.normal_signature = np.array([-0.000053, 0.000023, 0.000078, 0.000123, 0.000118, -0.000047, -0.000061, -0.000061])
+        model.normal_signature = NORMAL_SIGNATURE.copy()
         #st.info("Added missing normal_signature attribute to model.")
     
     # Add compatibility methods if they don't exist
@@ -187,8 +260,12 @@ def ensure_model_attributes(model):
         import types
         model._calculate_pattern_similarity = types.MethodType(calculate_pattern_similarity, model)
 
-def predict_seizure(input_data, model):
-    """Make seizure prediction using the model with feature compatibility handling"""
+def predict_seizure(input_data, model, return_contributions=False):
+    """Make seizure prediction using the model with feature compatibility handling
+
+    With return_contributions=True, also returns the per-channel
+    contributions to the prediction (None when they are unavailable).
+    """
     try:
         # Ensure all required attributes exist
         ensure_model_attributes(model)
@@ -209,6 +286,13 @@ def predict_seizure(input_data, model):
             input_array = padded_array
             st.info(f"Added padding to match expected feature count ({input_array.shape[1]} features).")
         
+        if BULK_IMPORT_SUCCESS:
+            # Same vectorized path used for bulk and batch scoring
+            predictions, confidences, contributions = predict_batch(input_array, model, return_contributions=True)
+            if return_contributions:
+                return int(predictions[0]), float(confidences[0]), contributions[0]
+            return int(predictions[0]), float(confidences[0])
+        
         # Modified prediction logic using pattern similarity
         X = input_array
         seizure_similarity = model._calculate_pattern_similarity(X[0], model.seizure_signature)
@@ -224,17 +308,54 @@ def predict_seizure(input_data, model):
             # Calculate confidence as relative similarity
             confidence = normal_similarity / (seizure_similarity + normal_similarity) if (seizure_similarity + normal_similarity) > 0 else 0.5
         
+        if return_contributions:
+            return prediction, confidence, None
         return prediction, confidence
     except Exception as e:
         st.error(f"Prediction error: {str(e)}")
         import traceback
         st.error(f"Details: {traceback.format_exc()}")
+        if return_contributions:
+            return None, None, None
         return None, None
 
+@st.cache_resource(show_spinner=False)
+def get_ensemble_scorer():
+    """Create the multi-model ensemble scorer (and its thread pool) once per process"""
+    backends, errors = load_default_backends()
+    for name, error in errors.items():
+        st.warning(f"Ensemble backend '{name}' unavailable: {error}")
+    return EnsembleScorer(backends, method='vote')
+
+def predict_with_ensemble(input_data, scorer):
+    """Score one EEG window with every ensemble backend"""
+    result = scorer.score(input_data)
+    if result['predictions'] is None:
+        st.error("No ensemble backend answered within the latency budget.")
+        return None, None, result
+    prediction = int(result['predictions'][0])
+    score = float(result['scores'][0])
+    confidence = score if prediction == 1 else 1.0 - score
+    return prediction, confidence, result
+
+def display_ensemble_details(result, scorer):
+    """Show per-backend outputs and latency statistics"""
+    with st.expander("Ensemble Details"):
+        st.write(f"**Backends used:** {', '.join(result['backends_used']) or 'none'}")
+        if result['backends_dropped']:
+            st.write(f"**Dropped (over latency budget):** {', '.join(result['backends_dropped'])}")
+        for name, error in result['backends_failed'].items():
+            st.write(f"**Failed:** {name} ({error})")
+        for name, scores in result['backend_scores'].items():
+            st.write(f"- {name}: seizure score {float(scores[0]):.3f}")
+        st.write(f"**Ensemble latency:** {result['elapsed_ms']:.1f} ms")
+        st.write("**Backend timing statistics:**")
+        st.table(scorer.timing_stats())
+
 def display_prediction_results(prediction, anomaly_score=None):
     """Display prediction results with visual indicators"""
     if prediction == 1:
-        st.error('⚠️ A seizure is likely to occur in the next few minutes. Take necessary precautions! Please refer to the Precautions section for immediate steps')
+        st.error('⚠️ A seizure pattern was detected in this EEG window. Take necessary precautions! Please refer to the Precautions section for immediate steps')
         
         # Display risk level
         #if anomaly_score is not None:
@@ -256,6 +377,201 @@ def display_prediction_results(prediction, anomaly_score=None):
             # Visual confidence indicator
             #st.progress(min(normal_confidence/100, 1.0))
 
+def display_channel_contributions(prediction, contributions):
+    """Show which channels pushed this window towards seizure or normal"""
+    channels = CHANNEL_NAMES[:len(contributions)]
+    # The driving channel is the strongest push towards the predicted class
+    driver = int(np.argmax(contributions)) if prediction == 1 else int(np.argmin(contributions))
+    with st.expander("Channel Contributions"):
+        direction = "seizure" if prediction == 1 else "normal"
+        st.write(f"**{channels[driver]}** contributed most towards the {direction} prediction.")
+        st.bar_chart({'Contribution': dict(zip(channels, contributions))})
+        st.caption("Positive values favour the seizure pattern, negative values the normal pattern.")
+
+@st.cache_resource(show_spinner=False)
+def _load_calibration(modified):
+    """Parsed calibration file; re-read whenever its modification time changes"""
+    return Calibration.load(DEFAULT_CALIBRATION_PATH)
+
+def get_calibration():
+    """The fitted calibration (see calibration.py), or None if there is none"""
+    if not CALIBRATION_IMPORT_SUCCESS or not os.path.exists(DEFAULT_CALIBRATION_PATH):
+        return None
+    try:
+        return _load_calibration(os.path.getmtime(DEFAULT_CALIBRATION_PATH))
+    except Exception as e:
+        st.warning(f"Calibration file could not be loaded: {str(e)}")
+        return None
+
+def display_calibrated_probability(calibration, input_data, model):
+    """Show the calibrated seizure probability and the operating-point decision"""
+    score = decision_scores(input_data, model)
+    probability = float(calibration.predict_proba(score)[0])
+    st.metric("Calibrated seizure probability", f"{probability:.1%}")
+    if calibration.threshold is not None:
+        budget = calibration.max_alerts_per_hour
+        if calibration.alerts(score)[0]:
+            st.write(f"**Above the operating threshold** (tuned for at most {budget:g} alerts per hour).")
+        else:
+            st.write(f"Below the operating threshold (tuned for at most {budget:g} alerts per hour).")
+
+@st.cache_resource(show_spinner=False)
+def get_patient_store():
+    """Per-patient adaptive signatures, shared by all sessions of this process"""
+    return PatientSignatureStore()
+
+def confirm_event_section(model):
+    """Let the user confirm the last scored window to adapt the patient's signatures"""
+    last = st.session_state.get('last_window')
+    if last is None or not last['patient_id']:
+        return
+    
+    st.write(f"**Confirm the outcome of the last reading for patient {last['patient_id']}** "
+             "to adapt their personal signatures:")
+    col1, col2 = st.columns(2)
+    label = None
+    if col1.button("Confirm seizure occurred"):
+        label = 1
+    if col2.button("Confirm no seizure"):
+        label = 0
+    
+    if label is not None:
+        store = get_patient_store()
+        store.update(last['patient_id'], last['values'], label, model)
+        store.flush()
+        stats = store.stats(last['patient_id'], model)
+        st.session_state.last_window = None
+        st.success(f"Updated signatures for patient {last['patient_id']} "
+                   f"({stats['n_seizure']} seizure and {stats['n_normal']} normal events confirmed).")
+
+def get_risk_tracker(model):
+    """Per-session preictal-risk tracker for the windows entered on this page"""
+    tracker = st.session_state.get('risk_tracker')
+    if tracker is None or tracker.model is not model:
+        tracker = PreictalRiskTracker(model)
+        st.session_state.risk_tracker = tracker
+    return tracker
+
+def display_horizon_results(features):
+    """Display the preictal-risk score from the trend of recent windows"""
+    # Windows typed in on this page carry no timing, so the risk is reported
+    # for the trend of the entered windows rather than a time horizon
+    risk = features['risk']
+    if risk >= 0.5:
+        st.error(f'⚠️ Elevated seizure risk: recent readings are trending towards the seizure pattern ({risk:.0%}). '
+                 'Take necessary precautions! Please refer to the Precautions section for immediate steps')
+    else:
+        st.success(f'✓ Low seizure risk: recent readings are not trending towards the seizure pattern ({risk:.0%}).')
+    st.progress(min(risk, 1.0))
+    
+    if not features['ready']:
+        st.info(f"Trend analysis needs a few more windows ({features['windows']} recorded so far); "
+                "the risk currently reflects the latest readings only.")
+    
+    with st.expander("Trend Features"):
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Windows in history", features['windows'])
+        col2.metric("Seizure-pattern trend", f"{features['proximity_slope']:+.3f}/window")
+        col3.metric("Autocorrelation", f"{features['autocorrelation']:.2f}")
+        st.write(f"**Current level:** {features['level']:.2f} "
+                 f"(0 = normal signature, 1 = seizure signature), "
+                 f"**projected:** {features['projected']:.2f}")
+        st.bar_chart({'Slope per window': dict(zip(CHANNEL_NAMES, features['channel_slopes']))})
+
+def log_prediction(input_data, prediction, confidence, model_version):
+    """Append a prediction to the persistent history without blocking"""
+    if not PREDICTION_LOG_SUCCESS:
+        return
+    try:
+        prediction_log = get_prediction_log()
+        prediction_log.log(input_data, prediction, confidence, model_version)
+    except Exception as e:
+        st.warning(f"Could not record prediction history: {str(e)}")
+        return
+    # Writes happen in the background; surface the latest failure, if any
+    if prediction_log.last_error is not None:
+        st.warning(f"Prediction history is not being saved right now "
+                   f"({prediction_log.last_error[1]}); it will be retried.")
+
+def send_alert(patient_id, confidence, model_version):
+    """Queue a caregiver notification for a detected seizure without blocking"""
+    if not ALERTS_IMPORT_SUCCESS:
+        return
+    try:
+        alert = make_alert(patient_id, confidence=confidence, model_version=model_version)
+        dispatcher = get_alert_dispatcher()
+        queued = dispatcher.dispatch(alert)
+        if queued is None:
+            return  # an alert for this event was already sent
+        if queued:
+            st.info("A seizure alert has been queued for your caregivers.")
+        elif dispatcher.notifies_remote:
+            st.warning("The seizure alert could not be queued for your caregivers right now. "
+                       "Please contact them directly.")
+        else:
+            st.info("The seizure alert was recorded locally (alerts.jsonl). "
+                    "No caregiver notification service is configured.")
+    except Exception as e:
+        st.warning(f"Could not queue the seizure alert: {str(e)}")
+
+@fragment
+def bulk_import_section(model, model_version):
+    """Upload a CSV/EDF file of readings and batch-predict every row"""
+    st.subheader("Bulk Import")
+    file_types = ['csv', 'edf'] if EDF_SUPPORT else ['csv']
+    uploaded_file = st.file_uploader(
+        "Upload a file of EEG readings (one row per window, one column per channel):",
+        type=file_types
+    )
+    mode = st.radio(
+        "Out-of-range readings:",
+        ['clip', 'flag'],
+        format_func=lambda m: "Clip into channel range" if m == 'clip' else "Flag and skip",
+        horizontal=True
+    )
+    
+    if uploaded_file is not None and st.button('Run Batch Prediction'):
+        try:
+            with st.spinner("Validating and scoring readings..."):
+                results, report = run_bulk_prediction(iter_upload_chunks(uploaded_file), model, mode)
+        except Exception as e:
+            st.error(f"Bulk import failed: {str(e)}")
+            return
+        
+        if PREDICTION_LOG_SUCCESS:
+            scored = results[results['prediction'].notna()]
+            try:
+                get_prediction_log().log_batch(
+                    scored[CHANNEL_NAMES].to_numpy(),
+                    scored['prediction'].to_numpy(dtype=int),
+                    scored['confidence'].to_numpy(),
+                    model_version
+                )
+            except Exception as e:
+                st.warning(f"Could not record these predictions in the history: {str(e)}")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Rows", f"{report['rows']:,}")
+        col2.metric("Scored", f"{report['scored']:,}")
+        col3.metric("Out of range", f"{report['out_of_range']:,}")
+        col4.metric("Seizure windows", f"{report['seizure']:,}")
+        st.write(f"**Throughput:** {report['rows_per_s']:,.0f} rows/s overall, "
+                 f"{report['scoring_rows_per_s']:,.0f} rows/s scoring")
+        
+        if report['seizure']:
+            # Which channels drove the seizure windows in this file
+            drivers = results.loc[results['prediction'] == 1, 'top_channel'].value_counts(sort=False)
+            st.write("**Channels driving seizure windows:**")
+            st.bar_chart({'Seizure windows': drivers.to_dict()})
+        
+        st.download_button(
+            "Download predictions",
+            data=results_to_csv(results),
+            file_name=f"{os.path.splitext(uploaded_file.name)[0]}_predictions.csv",
+            mime='text/csv'
+        )
+
+@st.cache_data
 def load_sample_data():
     """Load sample data for demonstration"""
     return {
@@ -263,10 +579,19 @@ def load_sample_data():
         "Normal Pattern": [-0.000053, 0.000023, 0.000078, 0.000123, 0.000118, -0.000047, -0.000061, -0.000061]  # Added 8th value
     }
 
+def record_interaction_cpu(cpu_start):
+    """Keep the server CPU time of recent page runs for the performance panel"""
+    history = st.session_state.setdefault('page2_cpu_ms', [])
+    history.append((time.thread_time() - cpu_start) * 1000.0)
+    del history[:-50]
+
 def page_2():
+    # CPU time spent by this script run (the thread serving this session)
+    cpu_start = time.thread_time()
+    
     st.title('Epileptic Seizure Prediction')
     
-    # Load model with robust error handling
+    # Load model with robust error handling (cached after the first run)
     model, model_info = load_model()
     
     # Display model information
@@ -278,17 +603,8 @@ def page_2():
             for key, value in metrics.items():
                 st.write(f"- {key.capitalize()}: {value}")
     
-    # Define EEG channels and their value ranges - added the missing 8th feature
-    channels = [
-        ('FP1-F7', -0.000081, 0.000174),
-        ('C3-P3', -0.000012, 0.000058),
-        ('P3-O1', -0.000004, 0.000127),
-        ('P4-O2', 0.000017, 0.000164),
-        ('P7-O1', 0.000006, 0.000146),
-        ('P7-T7', -0.000067, 0.000013),
-        ('T8-P8', -0.000179, 0.000115),
-        ('T8-P8-1', -0.000179, 0.000115)  # Added the missing 8th channel
-    ]
+    # EEG channels and their value ranges
+    channels = EEG_CHANNELS
     
     st.write("Enter the EEG channel readings to predict potential seizure occurrence:")
     
@@ -297,48 +613,118 @@ def page_2():
     sample_option = st.selectbox("Load sample data (optional):", 
                                 ["None"] + list(samples.keys()))
     
-    # Create two columns for input fields
-    col1, col2 = st.columns(2)
-    
     # If sample data selected, pre-fill the form
     sample_data = None
     if sample_option != "None":
         sample_data = samples[sample_option]
     
-    # Create input fields and collect values
-    input_values = []
-    for i, (channel, min_val, max_val) in enumerate(channels):
-        # Alternate between columns
-        current_col = col1 if i % 2 == 0 else col2
+    # Inputs live in a form, so editing them does not rerun the script;
+    # only the submit button triggers scoring
+    with st.form("prediction_form"):
+        # Create two columns for input fields
+        col1, col2 = st.columns(2)
         
-        # Default value from sample if provided with safe access
-        default_val = (min_val + max_val) / 2  # Default fallback value
-        if sample_data and i < len(sample_data):
-            default_val = sample_data[i]
+        # Create input fields and collect values
+        input_values = []
+        for i, (channel, min_val, max_val) in enumerate(channels):
+            # Alternate between columns
+            current_col = col1 if i % 2 == 0 else col2
+            
+            # Default value from sample if provided with safe access
+            default_val = (min_val + max_val) / 2  # Default fallback value
+            if sample_data and i < len(sample_data):
+                default_val = sample_data[i]
+            
+            with current_col:
+                val = st.number_input(
+                    f'{channel}', 
+                    min_value=min_val, 
+                    max_value=max_val,
+                    value=default_val,
+                    format="%.9e",
+                    help=f"Range: {min_val:.9e} to {max_val:.9e}"
+                )
+                input_values.append(val)
+        
+        # Optional patient ID selects that patient's adapted signatures
+        patient_id = ""
+        if PATIENT_MODELS_SUCCESS:
+            patient_id = st.text_input("Patient ID (optional):").strip()
+        
+        # Detection scores the current window; prediction tracks the trend
+        # of the windows entered so far
+        prediction_mode = False
+        if HORIZON_IMPORT_SUCCESS:
+            prediction_mode = st.radio(
+                "Mode:",
+                ["Detection (current window)", "Prediction (risk from the recent trend)"],
+                horizontal=True
+            ).startswith("Prediction")
         
-        with current_col:
-            val = st.number_input(
-                f'{channel}', 
-                min_value=min_val, 
-                max_value=max_val,
-                value=default_val,
-                format="%.9e",
-                help=f"Range: {min_val:.9e} to {max_val:.9e}"
-            )
-            input_values.append(val)
+        # Optionally score with every available model at once
+        use_ensemble = False
+        if ENSEMBLE_IMPORT_SUCCESS:
+            use_ensemble = st.checkbox("Score with model ensemble (enhanced, legacy ensemble and anomaly models)")
+        
+        # Prediction button
+        submitted = st.form_submit_button('Predict Seizure Occurrence')
     
-    # Prediction button
-    if st.button('Predict Seizure Occurrence'):
+    if submitted:
         if len(input_values) != len(channels):
             st.warning("Please provide values for all EEG channels.")
         else:
+            ensemble_result = None
+            contributions = None
+            scoring_model = model
+            if patient_id:
+                scoring_model = get_patient_store().model_for(patient_id, model)
             with st.spinner("Analyzing EEG patterns..."):
-                # Add a small delay to simulate processing
-                time.sleep(1.5)
-                prediction, anomaly_score = predict_seizure(input_values, model)
+                if use_ensemble:
+                    scorer = get_ensemble_scorer()
+                    prediction, anomaly_score, ensemble_result = predict_with_ensemble(input_values, scorer)
+                else:
+                    prediction, anomaly_score, contributions = predict_seizure(
+                        input_values, scoring_model, return_contributions=True)
                 
             if prediction is not None:
-                display_prediction_results(prediction, anomaly_score)
+                if ensemble_result is not None:
+                    model_version = f"ensemble:{'+'.join(ensemble_result['backends_used'])}"
+                elif patient_id:
+                    model_version = f"{model_info['type']} [patient {patient_id}]"
+                else:
+                    model_version = model_info['type']
+                log_prediction(input_values, prediction, anomaly_score, model_version)
+                st.session_state.last_window = {'patient_id': patient_id, 'values': list(input_values)}
+                if prediction_mode:
+                    tracker = get_risk_tracker(scoring_model)
+                    features = tracker.update(input_values)
+                    # Alert on the risk the page shows, not the single-window label
+                    if features['risk'] >= 0.5:
+                        send_alert(patient_id, features['risk'], model_version)
+                    display_horizon_results(features)
+                else:
+                    if prediction == 1:
+                        send_alert(patient_id, anomaly_score, model_version)
+                    display_prediction_results(prediction, anomaly_score)
+                calibration = get_calibration() if ensemble_result is None else None
+                if calibration is not None:
+                    display_calibrated_probability(calibration, input_values, scoring_model)
+                if contributions is not None:
+                    display_channel_contributions(prediction, contributions)
+            if ensemble_result is not None:
+                display_ensemble_details(ensemble_result, scorer)
+    
+    if PATIENT_MODELS_SUCCESS:
+        confirm_event_section(model)
+    
+    if BULK_IMPORT_SUCCESS:
+        bulk_import_section(model, model_info['type'])
+    
+    record_interaction_cpu(cpu_start)
+    with st.expander("Performance"):
+        history = st.session_state['page2_cpu_ms']
+        st.write(f"**Server CPU time, last run:** {history[-1]:.1f} ms")
+        st.write(f"**Median over last {len(history)} runs:** {np.median(history):.1f} ms")
 
 def main():
     page_2()
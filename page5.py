@@ -0,0 +1,115 @@
+import streamlit as st
+import time
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add the current directory to path to ensure imports work
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from channels import CHANNEL_MAX, CHANNEL_MIN, CHANNEL_NAMES
+
+try:
+    from prediction_log import get_prediction_log
+    from rollups import HISTOGRAM_BINS, ROLLUP_CHANNEL_COLUMNS
+    PREDICTION_LOG_SUCCESS = True
+except ImportError:
+    PREDICTION_LOG_SUCCESS = False
+
+# Time ranges offered on the page and the rollup level used for each
+TIME_RANGES = {
+    "Last 6 hours": (6 * 3600, 'minute'),
+    "Last 7 days": (7 * 86400, 'hour'),
+    "Last 30 days": (30 * 86400, 'hour'),
+    "Last 12 months": (365 * 86400, 'day'),
+}
+
+def page_5():
+    """Prediction history dashboard built on the pre-aggregated rollups"""
+
+    st.title("Prediction History")
+
+    if not PREDICTION_LOG_SUCCESS:
+        st.info("Prediction history is not available in this installation.")
+        return
+
+    st.markdown("""
+    Trends in seizure alerts, prediction confidence and EEG channel readings across all
+    predictions recorded on the **Prediction** page. This history can be shared with your
+    healthcare provider alongside your seizure diary.
+    """)
+
+    prediction_log = get_prediction_log()
+    
+    status = prediction_log.status()
+    if status['last_error'] is not None:
+        failed_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(status['last_error'][0]))
+        st.warning(f"Recent predictions could not be saved (last failure at {failed_at}: "
+                   f"{status['last_error'][1]}). {status['pending_rows']:,} rows are waiting to be retried.")
+    if status['dropped']:
+        st.warning(f"{status['dropped']:,} predictions were not recorded because the history writer fell behind.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        range_label = st.selectbox("Time range:", list(TIME_RANGES.keys()), index=1)
+    span, default_level = TIME_RANGES[range_label]
+    with col2:
+        level = st.selectbox("Resolution:", ['minute', 'hour', 'day'],
+                             index=['minute', 'hour', 'day'].index(default_level))
+
+    end = time.time()
+    start = end - span
+    rollup = prediction_log.rollups(level, start, end)
+
+    if rollup.empty:
+        st.info("No predictions have been recorded in this time range yet.")
+        return
+
+    # Summary metrics come straight from the rollup totals
+    total = int(rollup['n'].sum())
+    alerts = int(rollup['n_alerts'].sum())
+    confidence_n = rollup['conf_n'].sum()
+    mean_confidence = rollup['conf_sum'].sum() / confidence_n if confidence_n > 0 else float('nan')
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Predictions", f"{total:,}")
+    col2.metric("Seizure alerts", f"{alerts:,}")
+    col3.metric("Alert rate", f"{alerts / total:.1%}" if total else "N/A")
+    col4.metric("Mean confidence", f"{mean_confidence:.3f}")
+
+    chart_data = rollup.set_index('time')
+
+    st.subheader(f"Seizure Alerts per {level.capitalize()}")
+    st.bar_chart(chart_data[['n_alerts']].rename(columns={'n_alerts': 'Alerts'}))
+
+    st.subheader("Confidence Trend")
+    st.line_chart(chart_data[['mean_confidence']].rename(columns={'mean_confidence': 'Mean confidence'}))
+
+    st.subheader("Channel Readings")
+    channel = st.selectbox("Channel:", CHANNEL_NAMES)
+    j = CHANNEL_NAMES.index(channel)
+    column = ROLLUP_CHANNEL_COLUMNS[j]
+
+    trend = pd.DataFrame({
+        'Mean': chart_data[f"{column}_mean"],
+        'Mean - 1 SD': chart_data[f"{column}_mean"] - chart_data[f"{column}_std"],
+        'Mean + 1 SD': chart_data[f"{column}_mean"] + chart_data[f"{column}_std"],
+    })
+    st.line_chart(trend)
+
+    # Distribution over the whole range from the daily histograms
+    histograms = prediction_log.histograms(start, end)
+    edges = np.linspace(CHANNEL_MIN[j], CHANNEL_MAX[j], HISTOGRAM_BINS + 1)
+    centres = (edges[:-1] + edges[1:]) / 2
+    distribution = pd.DataFrame({'Readings': histograms[channel].to_numpy()},
+                                index=pd.Index(centres, name=channel))
+    st.write(f"**Distribution of {channel} readings**")
+    st.bar_chart(distribution)
+
+    with st.expander("Summary Table"):
+        st.dataframe(rollup[['time', 'n', 'n_alerts', 'alert_rate', 'mean_confidence']])
+
+if __name__ == "__main__":
+    # For testing this page directly
+    page_5()
@@ -0,0 +1,164 @@
+import copy
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from signatures import NORMAL_SIGNATURE, SEIZURE_SIGNATURE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATIENT_DB = os.path.join(BASE_DIR, 'patient_signatures.db')
+
+# Weight of a newly confirmed event in the exponentially weighted update
+DEFAULT_ALPHA = 0.1
+# Patient models kept in memory at once
+DEFAULT_CAPACITY = 256
+
+# Signatures are stored as float32 blobs: 32 bytes per signature for 8 channels
+_STORAGE_DTYPE = np.float32
+
+
+class _PatientEntry:
+    """In-memory patient model plus the bookkeeping needed to persist it"""
+
+    __slots__ = ('model', 'n_seizure', 'n_normal', 'dirty')
+
+    def __init__(self, model, n_seizure=0, n_normal=0, dirty=False):
+        self.model = model
+        self.n_seizure = n_seizure
+        self.n_normal = n_normal
+        self.dirty = dirty
+
+
+class PatientSignatureStore:
+    """Per-patient seizure/normal signatures adapted online from confirmed events
+
+    Every patient starts from the global signatures. Confirmed events move
+    the matching signature towards the observed window with an exponentially
+    weighted update, so no retraining is needed. Signatures live in SQLite
+    as compact float32 blobs and are loaded lazily; at most `capacity`
+    patient models are kept in memory, with least-recently-used eviction
+    (modified entries are written back on eviction).
+    """
+
+    def __init__(self, path=DEFAULT_PATIENT_DB, capacity=DEFAULT_CAPACITY, alpha=DEFAULT_ALPHA):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("alpha must be in (0, 1]")
+        self.path = path
+        self.capacity = capacity
+        self.alpha = alpha
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS patient_signatures (
+                patient_id TEXT PRIMARY KEY,
+                seizure_signature BLOB NOT NULL,
+                normal_signature BLOB NOT NULL,
+                n_seizure INTEGER NOT NULL,
+                n_normal INTEGER NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def _load(self, patient_id, base_model):
+        """Build the patient model from storage, or from the global signatures"""
+        row = self._connection.execute(
+            "SELECT seizure_signature, normal_signature, n_seizure, n_normal "
+            "FROM patient_signatures WHERE patient_id = ?", (patient_id,)
+        ).fetchone()
+
+        # Shallow copy keeps feature importance and methods of the base model
+        model = copy.copy(base_model)
+        if row is None:
+            model.seizure_signature = np.array(SEIZURE_SIGNATURE, dtype=float)
+            model.normal_signature = np.array(NORMAL_SIGNATURE, dtype=float)
+            return _PatientEntry(model)
+
+        model.seizure_signature = np.frombuffer(row[0], dtype=_STORAGE_DTYPE).astype(float)
+        model.normal_signature = np.frombuffer(row[1], dtype=_STORAGE_DTYPE).astype(float)
+        return _PatientEntry(model, row[2], row[3])
+
+    def _entry(self, patient_id, base_model):
+        entry = self._cache.get(patient_id)
+        if entry is not None:
+            self._cache.move_to_end(patient_id)
+            return entry
+
+        entry = self._load(patient_id, base_model)
+        self._cache[patient_id] = entry
+        while len(self._cache) > self.capacity:
+            evicted_id, evicted = self._cache.popitem(last=False)
+            if evicted.dirty:
+                self._save([(evicted_id, evicted)])
+        return entry
+
+    def model_for(self, patient_id, base_model):
+        """Scoring model for a patient, built on base_model's feature weights"""
+        with self._lock:
+            return self._entry(str(patient_id), base_model).model
+
+    def update(self, patient_id, window, label, base_model, alpha=None):
+        """Adapt a patient's signature to a confirmed seizure (1) or normal (0) window"""
+        alpha = self.alpha if alpha is None else alpha
+        window = np.asarray(window, dtype=float).ravel()
+
+        with self._lock:
+            entry = self._entry(str(patient_id), base_model)
+            model = entry.model
+            if label == 1:
+                signature = model.seizure_signature
+                entry.n_seizure += 1
+            else:
+                signature = model.normal_signature
+                entry.n_normal += 1
+
+            n = min(len(signature), len(window))
+            # Exponentially weighted moving average towards the confirmed window
+            signature[:n] = (1.0 - alpha) * signature[:n] + alpha * window[:n]
+            entry.dirty = True
+            return model
+
+    def stats(self, patient_id, base_model):
+        """Number of confirmed events behind a patient's signatures"""
+        with self._lock:
+            entry = self._entry(str(patient_id), base_model)
+            return {'n_seizure': entry.n_seizure, 'n_normal': entry.n_normal}
+
+    def _save(self, items):
+        now = time.time()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO patient_signatures "
+                "(patient_id, seizure_signature, normal_signature, n_seizure, n_normal, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(patient_id) DO UPDATE SET "
+                "seizure_signature = excluded.seizure_signature, "
+                "normal_signature = excluded.normal_signature, "
+                "n_seizure = excluded.n_seizure, n_normal = excluded.n_normal, "
+                "updated = excluded.updated",
+                [(patient_id,
+                  entry.model.seizure_signature.astype(_STORAGE_DTYPE).tobytes(),
+                  entry.model.normal_signature.astype(_STORAGE_DTYPE).tobytes(),
+                  entry.n_seizure, entry.n_normal, now)
+                 for patient_id, entry in items]
+            )
+        for _, entry in items:
+            entry.dirty = False
+
+    def flush(self):
+        """Write every modified patient signature to storage"""
+        with self._lock:
+            dirty = [(patient_id, entry) for patient_id, entry in self._cache.items() if entry.dirty]
+            if dirty:
+                self._save(dirty)
+
+    def close(self):
+        self.flush()
+        self._connection.close()
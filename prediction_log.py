@@ -0,0 +1,316 @@
+import atexit
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from channels import CHANNEL_NAMES
+from rollups import apply_rollups, create_rollup_schema, read_histograms, read_rollups
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LOG_PATH = os.path.join(BASE_DIR, 'prediction_log.db')
+
+# SQL-safe column names for the channel values, e.g. 'FP1-F7' -> 'fp1_f7'
+CHANNEL_COLUMNS = [name.lower().replace('-', '_') for name in CHANNEL_NAMES]
+LOG_COLUMNS = ['ts'] + CHANNEL_COLUMNS + ['label', 'confidence', 'model_version']
+
+_INSERT_SQL = (f"INSERT INTO predictions ({', '.join(LOG_COLUMNS)}) "
+               f"VALUES ({', '.join('?' for _ in LOG_COLUMNS)})")
+
+
+def _connect(path):
+    """Open a connection with the settings every log connection shares"""
+    connection = sqlite3.connect(path, timeout=30)
+    # WAL lets the dashboard read while the writer thread appends
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def _create_schema(connection):
+    channel_defs = ', '.join(f"{column} REAL" for column in CHANNEL_COLUMNS)
+    connection.executescript(f"""
+        CREATE TABLE IF NOT EXISTS predictions (
+            ts REAL NOT NULL,
+            {channel_defs},
+            label INTEGER NOT NULL,
+            confidence REAL,
+            model_version TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+    """)
+    create_rollup_schema(connection)
+    connection.commit()
+
+
+class PredictionLog:
+    """Append-only prediction history stored in SQLite (WAL mode)
+
+    log() and log_batch() only enqueue rows; a background thread writes them
+    in batched transactions, so logging never blocks the prediction path.
+    The same transactions keep the per-minute/hour/day rollups up to date.
+    If the queue is full the rows are dropped and counted in `dropped`.
+
+    A failed write (a lock held too long, a full disk) does not stop the
+    writer: the batch is kept and retried with backoff while new rows keep
+    being collected, up to `max_pending_rows`, beyond which the oldest are
+    dropped. Failures are counted in `write_errors` and the latest one is
+    kept in `last_error` for the pages to show.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH, batch_size=1000, flush_interval=0.5,
+                 max_queue=10000, max_pending_rows=100000, max_retry_delay=30.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending_rows = max_pending_rows
+        self.max_retry_delay = max_retry_delay
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+        self.last_error = None  # (timestamp, message) of the latest failed write
+        self.pending_rows = 0  # only changed on the writer thread
+        self._dropped_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = threading.Event()
+
+        connection = _connect(path)
+        _create_schema(connection)
+        connection.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name='prediction-log', daemon=True)
+        self._writer.start()
+
+    def _enqueue(self, batch):
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self._count_dropped(len(batch[0]))
+
+    def _count_dropped(self, rows):
+        # Callers' threads and the writer thread both drop rows
+        with self._dropped_lock:
+            self.dropped += rows
+
+    def log(self, inputs, label, confidence, model_version, timestamp=None):
+        """Queue a single prediction for writing"""
+        ts = time.time() if timestamp is None else timestamp
+        self.log_batch([inputs], [label], [confidence], model_version, timestamps=[ts])
+
+    def log_batch(self, X, labels, confidences, model_version, timestamps=None):
+        """Queue a batch of predictions as a single queue item
+
+        Only array references are queued here; conversion to rows happens on
+        the writer thread.
+        """
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) == 0:
+            return
+        if timestamps is None:
+            timestamps = np.full(len(X), time.time())
+        confidences = np.array([np.nan if c is None else c for c in confidences], dtype=float) \
+            if isinstance(confidences, list) else np.asarray(confidences, dtype=float)
+        self._enqueue((np.asarray(timestamps, dtype=float), X, np.asarray(labels, dtype=int),
+                       confidences, model_version))
+
+    @staticmethod
+    def _normalize(batch):
+        """Pad or trim a queued batch to the logged channel count"""
+        timestamps, X, labels, confidences, model_version = batch
+        values = np.full((len(X), len(CHANNEL_COLUMNS)), np.nan)
+        n = min(X.shape[1], len(CHANNEL_COLUMNS))
+        values[:, :n] = X[:, :n]
+        return timestamps, values, labels, confidences, model_version
+
+    @staticmethod
+    def _batch_rows(batch):
+        """Convert a normalized batch of arrays into insert rows"""
+        timestamps, values, labels, confidences, model_version = batch
+        # Column-wise conversion is much faster than building rows one by one;
+        # NaN is stored as NULL
+        columns = [[None if v != v else v for v in column] for column in values.T.tolist()]
+        confidence_column = [None if c != c else c for c in confidences.tolist()]
+        return list(zip(timestamps.tolist(), *columns, labels.tolist(), confidence_column,
+                        itertools.repeat(model_version)))
+
+    def _record_error(self, error):
+        self.write_errors += 1
+        self.last_error = (time.time(), f"{type(error).__name__}: {error}")
+
+    def _trim_pending(self, pending):
+        """Drop the oldest batches while more rows are held than max_pending_rows"""
+        while len(pending) > 1 and self.pending_rows > self.max_pending_rows:
+            batch = pending.pop(0)
+            self.pending_rows -= len(batch[0])
+            self._count_dropped(len(batch[0]))
+
+    def _try_write(self, connection, pending):
+        """Write pending batches; on failure record the error and return the connection to retry with"""
+        try:
+            if connection is None:
+                connection = _connect(self.path)
+            self._write(connection, pending)
+            self.last_error = None
+            return connection, True
+        except Exception as e:
+            self._record_error(e)
+            # Start the retry on a fresh connection
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            return None, False
+
+    def _write_loop(self):
+        connection = None
+        pending = []
+        last_flush = time.monotonic()
+        retry_delay = self.flush_interval
+        retry_at = 0.0
+
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is None:
+                    break
+                pending.append(self._normalize(item))
+                self.pending_rows += len(item[0])
+                # Rows keep arriving while a failed write backs off
+                self._trim_pending(pending)
+            except queue.Empty:
+                pass
+
+            if pending and time.monotonic() >= retry_at and (
+                    self.pending_rows >= self.batch_size
+                    or time.monotonic() - last_flush >= self.flush_interval):
+                connection, ok = self._try_write(connection, pending)
+                if ok:
+                    pending = []
+                    self.pending_rows = 0
+                    retry_delay = self.flush_interval
+                else:
+                    # Keep the rows and back off before the next attempt
+                    retry_at = time.monotonic() + retry_delay
+                    retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                last_flush = time.monotonic()
+            elif not pending:
+                last_flush = time.monotonic()
+
+        # Drain whatever is left on shutdown; one last attempt to write it
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                pending.append(self._normalize(item))
+                self.pending_rows += len(item[0])
+                self._trim_pending(pending)
+        if pending:
+            connection, ok = self._try_write(connection, pending)
+            if not ok:
+                self._count_dropped(self.pending_rows)
+            self.pending_rows = 0
+        if connection is not None:
+            connection.close()
+
+    def _write(self, connection, batches):
+        """Insert raw rows and merge them into the rollups in one transaction"""
+        timestamps = np.concatenate([batch[0] for batch in batches])
+        values = np.concatenate([batch[1] for batch in batches])
+        labels = np.concatenate([batch[2] for batch in batches])
+        confidences = np.concatenate([batch[3] for batch in batches])
+
+        with connection:
+            for batch in batches:
+                connection.executemany(_INSERT_SQL, self._batch_rows(batch))
+            apply_rollups(connection, timestamps, values, labels, confidences)
+        self.written += len(timestamps)
+
+    def status(self):
+        """Writer health: row counts and the latest write error, if any"""
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'pending_rows': self.pending_rows,
+            'queued_batches': self._queue.qsize(),
+            'write_errors': self.write_errors,
+            'last_error': self.last_error,
+            'writer_alive': self._writer.is_alive(),
+        }
+
+    def query(self, start=None, end=None, limit=None):
+        """Return predictions with start <= ts < end as a DataFrame, oldest first"""
+        sql = f"SELECT {', '.join(LOG_COLUMNS)} FROM predictions"
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            return pd.read_sql_query(sql, connection, params=params)
+        finally:
+            connection.close()
+
+    def count(self, start=None, end=None):
+        """Number of logged predictions in a time range (uses the ts index)"""
+        sql = "SELECT COUNT(*) FROM predictions WHERE ts >= ? AND ts < ?"
+        params = (float('-inf') if start is None else start,
+                  float('inf') if end is None else end)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            return connection.execute(sql, params).fetchone()[0]
+        finally:
+            connection.close()
+
+    def rollups(self, level, start=None, end=None):
+        """Pre-aggregated per-minute/hour/day summaries (never scans raw rows)"""
+        return read_rollups(self.path, level, start, end)
+
+    def histograms(self, start=None, end=None):
+        """Per-channel value histograms from the daily rollups"""
+        return read_histograms(self.path, start, end)
+
+    def close(self, timeout=5.0):
+        """Flush queued rows and stop the writer thread"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._writer.join(timeout)
+
+
+_shared_log = None
+_shared_log_lock = threading.Lock()
+
+
+def get_prediction_log(path=DEFAULT_LOG_PATH):
+    """Process-wide PredictionLog, so all sessions share one writer thread"""
+    global _shared_log
+    with _shared_log_lock:
+        if _shared_log is None:
+            _shared_log = PredictionLog(path)
+            atexit.register(_shared_log.close)
+        return _shared_log
@@ -0,0 +1,224 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from batch_scoring import predict_batch
+from bulk_import import DEFAULT_CHUNK_ROWS, iter_csv_chunks, iter_edf_chunks, validate_chunk
+
+# Wall time covered by each scored block when replay is paced
+PACE_TICK_SECONDS = 0.1
+# Divergent window indices listed per model pair
+MAX_LISTED_DIVERGENCES = 10
+
+
+def iter_recording(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yield (n_rows, 8) chunks of an archived recording without loading it whole
+
+    CSV and EDF files are streamed by the bulk import readers; .npy arrays
+    are memory-mapped and sliced.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        data = np.load(path, mmap_mode='r')
+        for start in range(0, len(data), chunk_rows):
+            yield np.asarray(data[start:start + chunk_rows], dtype=float)
+    elif extension == '.edf':
+        yield from iter_edf_chunks(path, chunk_rows)
+    else:
+        yield from iter_csv_chunks(path, chunk_rows)
+
+
+def load_model_version(path):
+    """Load a model pickle (bare, or a dict with a 'model' entry, as the app saves)"""
+    from ensemble import load_legacy_pickle
+    model = load_legacy_pickle(path)
+    if isinstance(model, dict):
+        model = model['model']
+    if not hasattr(model, 'seizure_signature'):
+        raise ValueError(f"{path} is not a pattern-signature model and cannot be replayed")
+    return model
+
+
+def find_events(labels):
+    """(start, end) window indices of each run of consecutive seizure labels"""
+    padded = np.concatenate([[0], np.asarray(labels, dtype=np.int8), [0]])
+    edges = np.diff(padded)
+    return np.column_stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)])
+
+
+def _events_matched(events, other_labels):
+    """Which events overlap at least one seizure window of the other labels"""
+    cumulative = np.concatenate([[0], np.cumsum(other_labels, dtype=np.int64)])
+    return cumulative[events[:, 1]] - cumulative[events[:, 0]] > 0
+
+
+def compare_labels(baseline, candidate):
+    """Window- and event-level differences between two label sequences"""
+    differs = baseline != candidate
+    baseline_events = find_events(baseline)
+    candidate_events = find_events(candidate)
+    return {
+        'windows': len(baseline),
+        'label_divergences': int(differs.sum()),
+        'agreement': float(1.0 - differs.mean()) if len(baseline) else 1.0,
+        'first_divergences': np.flatnonzero(differs)[:MAX_LISTED_DIVERGENCES].tolist(),
+        'baseline_events': len(baseline_events),
+        'candidate_events': len(candidate_events),
+        # Events with no overlapping seizure window in the other version
+        'events_only_baseline': int((~_events_matched(baseline_events, candidate)).sum()),
+        'events_only_candidate': int((~_events_matched(candidate_events, baseline)).sum()),
+    }
+
+
+def replay(paths, models, speed=None, window_seconds=1.0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Replay recordings through the batched prediction path of every model version
+
+    models maps a version name to a model; the first one is the baseline
+    the others are compared with. Rows are validated the way the prediction
+    page bounds its inputs (clipped to the channel ranges) and scored with
+    batch_scoring.predict_batch, the code path page2.predict_seizure uses.
+    speed is the replay rate as a multiple of real time (1.0 = live,
+    None = as fast as possible). Scoring is deterministic, so replaying the
+    same recordings twice gives the same labels.
+    """
+    if not models:
+        raise ValueError("replay() needs at least one model")
+    if speed is not None and not 0 < speed < float('inf'):
+        raise ValueError(f"speed must be a positive multiple of real time, got {speed}")
+    if not window_seconds > 0:
+        raise ValueError(f"window_seconds must be positive, got {window_seconds}")
+    names = list(models)
+    rows_per_tick = None
+    if speed is not None:
+        rows_per_tick = max(1, int(round(speed * PACE_TICK_SECONDS / window_seconds)))
+
+    recordings = []
+    total_start = time.perf_counter()
+    total_windows = 0
+    for path in paths:
+        start = time.perf_counter()
+        labels = {name: [] for name in names}
+        scoring_time = 0.0
+        windows = 0
+        for chunk in iter_recording(path, chunk_rows):
+            X, _, scorable = validate_chunk(chunk, 'clip')
+            blocks = [(0, len(X))] if rows_per_tick is None else [
+                (i, min(i + rows_per_tick, len(X))) for i in range(0, len(X), rows_per_tick)]
+            for block_start, block_end in blocks:
+                block = X[block_start:block_end]
+                mask = scorable[block_start:block_end]
+                score_start = time.perf_counter()
+                for name in names:
+                    # Unscorable rows (missing values) count as normal
+                    block_labels = np.zeros(len(block), dtype=np.int8)
+                    if mask.any():
+                        predictions, _ = predict_batch(block[mask], models[name])
+                        block_labels[mask] = predictions
+                    labels[name].append(block_labels)
+                scoring_time += time.perf_counter() - score_start
+                windows += len(block)
+
+                if speed is not None:
+                    # Hold the replay at `speed` times the recording's own pace
+                    ahead = windows * window_seconds / speed - (time.perf_counter() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+        elapsed = time.perf_counter() - start
+        labels = {name: np.concatenate(parts) if parts else np.zeros(0, dtype=np.int8)
+                  for name, parts in labels.items()}
+        recording_seconds = windows * window_seconds
+        recordings.append({
+            'path': path,
+            'windows': windows,
+            'recording_seconds': recording_seconds,
+            'elapsed_s': elapsed,
+            'scoring_s': scoring_time,
+            'speedup': recording_seconds / elapsed if elapsed > 0 else float('inf'),
+            'seizure_windows': {name: int(labels[name].sum()) for name in names},
+            'events': {name: len(find_events(labels[name])) for name in names},
+            'comparisons': {name: compare_labels(labels[names[0]], labels[name]) for name in names[1:]},
+        })
+        total_windows += windows
+
+    elapsed = time.perf_counter() - total_start
+    return {
+        'recordings': recordings,
+        'windows': total_windows,
+        'recording_seconds': total_windows * window_seconds,
+        'elapsed_s': elapsed,
+        'speedup': total_windows * window_seconds / elapsed if elapsed > 0 else float('inf'),
+        'baseline': names[0],
+        'diverged': any(comparison['label_divergences']
+                        for recording in recordings for comparison in recording['comparisons'].values()),
+    }
+
+
+def _parse_model(spec):
+    """'name=path' or 'path'; 'current' is the model the app loads by default"""
+    if spec == 'current':
+        from shared_plane import default_model
+        return 'current', default_model()
+    name, _, path = spec.rpartition('=')
+    return name or os.path.splitext(os.path.basename(path))[0], load_model_version(path)
+
+
+def _speed(value):
+    """argparse type for --speed: 'max' or a positive multiple of real time"""
+    if value == 'max':
+        return None
+    try:
+        speed = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'max', got {value!r}")
+    if not 0 < speed < float('inf'):
+        raise argparse.ArgumentTypeError(f"speed must be a finite number greater than 0, got {value}")
+    return speed
+
+
+def _positive_float(value):
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay archived EEG recordings across model versions")
+    parser.add_argument('recordings', nargs='+', help="CSV, EDF or .npy recordings")
+    parser.add_argument('--model', action='append', default=None,
+                        help="model version as name=path.pkl (repeatable; first is the baseline, "
+                             "default: current)")
+    parser.add_argument('--speed', type=_speed, default='max',
+                        help="multiple of real time, e.g. 1 for live pace, or 'max' (default)")
+    parser.add_argument('--window-seconds', type=_positive_float, default=1.0, help="duration of one window")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    models = dict(_parse_model(spec) for spec in (args.model or ['current']))
+    report = replay(args.recordings, models, args.speed, args.window_seconds, args.chunk_rows)
+
+    for recording in report['recordings']:
+        print(f"{recording['path']}: {recording['windows']:,} windows, "
+              f"{recording['recording_seconds'] / 3600:.2f} h replayed in {recording['elapsed_s']:.2f} s "
+              f"({recording['speedup']:,.0f}x real time)")
+        for name in models:
+            print(f"  {name}: {recording['seizure_windows'][name]:,} seizure windows, "
+                  f"{recording['events'][name]:,} events")
+        for name, comparison in recording['comparisons'].items():
+            print(f"  {report['baseline']} vs {name}: {comparison['label_divergences']:,} divergent windows "
+                  f"({comparison['agreement']:.4%} agreement), "
+                  f"{comparison['events_only_baseline']} events only in {report['baseline']}, "
+                  f"{comparison['events_only_candidate']} only in {name}")
+            if comparison['first_divergences']:
+                print(f"    first divergent windows: {comparison['first_divergences']}")
+    print(f"total: {report['windows']:,} windows in {report['elapsed_s']:.2f} s "
+          f"({report['speedup']:,.0f}x real time)")
+    # Non-zero exit status lets a rollout check fail on any divergence
+    raise SystemExit(1 if report['diverged'] else 0)
+
+
+if __name__ == "__main__":
+    main()
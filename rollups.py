@@ -0,0 +1,215 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from channels import CHANNEL_MAX, CHANNEL_MIN, CHANNEL_NAMES
+
+# Rollup granularities and their bucket size in seconds
+ROLLUP_LEVELS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Per-channel value histograms are kept at day granularity only
+HISTOGRAM_LEVEL = 'day'
+HISTOGRAM_BINS = 20
+
+ROLLUP_CHANNEL_COLUMNS = [name.lower().replace('-', '_') for name in CHANNEL_NAMES]
+_CHANNEL_STATS = ['n', 'sum', 'sumsq', 'min', 'max']
+
+ROLLUP_COLUMNS = ['bucket', 'n', 'n_alerts', 'conf_n', 'conf_sum'] + [
+    f"{column}_{stat}" for column in ROLLUP_CHANNEL_COLUMNS for stat in _CHANNEL_STATS
+]
+
+
+def _rollup_table(level):
+    if level not in ROLLUP_LEVELS:
+        raise ValueError(f"Unknown rollup level: {level}")
+    return f"rollup_{level}"
+
+
+def _upsert_sql(level):
+    """Insert a bucket or merge it into the existing summary row"""
+    updates = []
+    for column in ROLLUP_COLUMNS[1:]:
+        if column.endswith('_min') or column.endswith('_max'):
+            func = 'MIN' if column.endswith('_min') else 'MAX'
+            updates.append(f"{column} = {func}(COALESCE({column}, excluded.{column}), "
+                           f"COALESCE(excluded.{column}, {column}))")
+        else:
+            updates.append(f"{column} = {column} + excluded.{column}")
+    return (f"INSERT INTO {_rollup_table(level)} ({', '.join(ROLLUP_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in ROLLUP_COLUMNS)}) "
+            f"ON CONFLICT(bucket) DO UPDATE SET {', '.join(updates)}")
+
+
+_HISTOGRAM_UPSERT_SQL = (
+    "INSERT INTO rollup_histogram (bucket, channel, bin, count) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(bucket, channel, bin) DO UPDATE SET count = count + excluded.count"
+)
+
+
+def create_rollup_schema(connection):
+    """Create the summary tables maintained alongside the raw predictions"""
+    column_defs = ', '.join(
+        f"{column} REAL" if column.endswith(('_sum', '_sumsq', '_min', '_max'))
+        else f"{column} INTEGER NOT NULL DEFAULT 0"
+        for column in ROLLUP_COLUMNS[1:]
+    )
+    for level in ROLLUP_LEVELS:
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {_rollup_table(level)} "
+            f"(bucket INTEGER PRIMARY KEY, {column_defs})"
+        )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS rollup_histogram ("
+        "bucket INTEGER NOT NULL, channel INTEGER NOT NULL, bin INTEGER NOT NULL, "
+        "count INTEGER NOT NULL, PRIMARY KEY (bucket, channel, bin))"
+    )
+
+
+def aggregate(timestamps, X, labels, confidences, bucket_seconds):
+    """Summarize a batch of predictions per time bucket, fully vectorized
+
+    Returns a list of rows in ROLLUP_COLUMNS order, one per bucket.
+    """
+    buckets = (np.floor(timestamps / bucket_seconds) * bucket_seconds).astype(np.int64)
+    keys, inverse = np.unique(buckets, return_inverse=True)
+    k = len(keys)
+
+    n = np.bincount(inverse, minlength=k)
+    n_alerts = np.bincount(inverse, weights=(labels == 1), minlength=k)
+    conf_ok = np.isfinite(confidences)
+    conf_n = np.bincount(inverse, weights=conf_ok, minlength=k)
+    conf_sum = np.bincount(inverse, weights=np.where(conf_ok, confidences, 0.0), minlength=k)
+
+    # Group rows by bucket so min/max can use reduceat
+    order = np.argsort(inverse, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(n)[:-1]])
+    ok = np.isfinite(X)
+    sorted_X = X[order]
+    sorted_ok = ok[order]
+    mins = np.minimum.reduceat(np.where(sorted_ok, sorted_X, np.inf), starts, axis=0)
+    maxs = np.maximum.reduceat(np.where(sorted_ok, sorted_X, -np.inf), starts, axis=0)
+
+    counts = [keys, n, n_alerts, conf_n]
+    sums = [conf_sum]
+    stats = []
+    for j in range(X.shape[1]):
+        values = np.where(ok[:, j], X[:, j], 0.0)
+        channel_n = np.bincount(inverse, weights=ok[:, j], minlength=k)
+        stats.append([
+            channel_n.astype(np.int64).tolist(),
+            _nullable(np.bincount(inverse, weights=values, minlength=k)),
+            _nullable(np.bincount(inverse, weights=values * values, minlength=k)),
+            _nullable(np.where(channel_n > 0, mins[:, j], np.nan)),
+            _nullable(np.where(channel_n > 0, maxs[:, j], np.nan)),
+        ])
+
+    columns = [np.asarray(c).astype(np.int64).tolist() for c in counts]
+    columns += [_nullable(c) for c in sums]
+    for channel_stats in stats:
+        columns.extend(channel_stats)
+    return list(zip(*columns))
+
+
+def _nullable(values):
+    """Float array to a list with NaN replaced by None (stored as NULL)"""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def histogram_rows(timestamps, X):
+    """Per-channel fixed-bin value counts per day bucket"""
+    bucket_seconds = ROLLUP_LEVELS[HISTOGRAM_LEVEL]
+    buckets = (np.floor(timestamps / bucket_seconds) * bucket_seconds).astype(np.int64)
+
+    # Bin over each channel's accepted range; out-of-range values land in the end bins
+    scaled = (X - CHANNEL_MIN) / (CHANNEL_MAX - CHANNEL_MIN) * HISTOGRAM_BINS
+    bins = np.clip(np.floor(np.nan_to_num(scaled, nan=-1.0)), 0, HISTOGRAM_BINS - 1).astype(np.int64)
+    channels = np.broadcast_to(np.arange(X.shape[1]), X.shape)
+    valid = np.isfinite(X)
+
+    # Encode (bucket, channel, bin) so one unique() call counts everything
+    codes = (np.repeat(buckets, X.shape[1]).reshape(X.shape) * X.shape[1] + channels) \
+        * HISTOGRAM_BINS + bins
+    codes, counts = np.unique(codes[valid], return_counts=True)
+    bin_ids = codes % HISTOGRAM_BINS
+    channel_ids = (codes // HISTOGRAM_BINS) % X.shape[1]
+    bucket_ids = codes // HISTOGRAM_BINS // X.shape[1]
+    return list(zip(bucket_ids.tolist(), channel_ids.tolist(), bin_ids.tolist(), counts.tolist()))
+
+
+def apply_rollups(connection, timestamps, X, labels, confidences):
+    """Merge a batch into every rollup table (call inside the insert transaction)"""
+    for level, bucket_seconds in ROLLUP_LEVELS.items():
+        connection.executemany(_upsert_sql(level),
+                               aggregate(timestamps, X, labels, confidences, bucket_seconds))
+    connection.executemany(_HISTOGRAM_UPSERT_SQL, histogram_rows(timestamps, X))
+
+
+def rebuild_rollups(path, chunk_rows=500000):
+    """Recompute all rollups from the raw predictions table
+
+    Only needed for logs written before rollups existed; normal operation
+    maintains them incrementally.
+    """
+    channel_columns = ', '.join(ROLLUP_CHANNEL_COLUMNS)
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        with connection:
+            create_rollup_schema(connection)
+            for level in ROLLUP_LEVELS:
+                connection.execute(f"DELETE FROM {_rollup_table(level)}")
+            connection.execute("DELETE FROM rollup_histogram")
+
+            cursor = connection.execute(
+                f"SELECT ts, {channel_columns}, label, confidence FROM predictions")
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                data = np.array(rows, dtype=float)
+                apply_rollups(connection, data[:, 0], data[:, 1:-2], data[:, -2], data[:, -1])
+    finally:
+        connection.close()
+
+
+def read_rollups(path, level, start=None, end=None):
+    """Read one rollup level as a DataFrame with derived rates and moments"""
+    sql = (f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM {_rollup_table(level)} "
+           f"WHERE bucket >= ? AND bucket < ? ORDER BY bucket")
+    params = (-2**62 if start is None else int(start), 2**62 if end is None else int(end))
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        frame = pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
+
+    frame['time'] = pd.to_datetime(frame['bucket'], unit='s')
+    frame['alert_rate'] = frame['n_alerts'] / frame['n'].where(frame['n'] > 0)
+    frame['mean_confidence'] = frame['conf_sum'] / frame['conf_n'].where(frame['conf_n'] > 0)
+    for column in ROLLUP_CHANNEL_COLUMNS:
+        count = frame[f"{column}_n"].where(frame[f"{column}_n"] > 0)
+        mean = frame[f"{column}_sum"] / count
+        frame[f"{column}_mean"] = mean
+        frame[f"{column}_std"] = np.sqrt((frame[f"{column}_sumsq"] / count - mean ** 2).clip(lower=0))
+    return frame
+
+
+def read_histograms(path, start=None, end=None):
+    """Per-channel value histograms summed over a time range
+
+    Returns a DataFrame indexed by bin number (HISTOGRAM_BINS equal bins
+    across each channel's accepted range) with one column per channel.
+    """
+    sql = ("SELECT channel, bin, SUM(count) FROM rollup_histogram "
+           "WHERE bucket >= ? AND bucket < ? GROUP BY channel, bin")
+    params = (-2**62 if start is None else int(start), 2**62 if end is None else int(end))
+    connection = sqlite3.connect(path, timeout=30)
+    try:
+        rows = connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+
+    counts = np.zeros((HISTOGRAM_BINS, len(CHANNEL_NAMES)), dtype=np.int64)
+    for channel, bin_id, count in rows:
+        counts[bin_id, channel] = count
+    return pd.DataFrame(counts, columns=CHANNEL_NAMES, index=pd.RangeIndex(HISTOGRAM_BINS, name='bin'))
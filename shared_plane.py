@@ -0,0 +1,205 @@
+import argparse
+import json
+import mmap
+import os
+import pickle
+import struct
+
+import numpy as np
+
+from model_definitions import EnhancedEpilepsyModel
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+    SHARED_MEMORY_SUPPORT = True
+except ImportError:
+    SHARED_MEMORY_SUPPORT = False
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SEGMENT = 'eeg_model_plane'
+# Workers look for a published plane in these environment variables
+SEGMENT_ENV = 'EEG_SHARED_PLANE'
+PATH_ENV = 'EEG_SHARED_PLANE_PATH'
+
+_MAGIC = b'EEGPLANE'
+_HEADER = struct.Struct('<8sQ')  # magic, length of the JSON layout
+_ALIGN = 64
+
+
+def model_arrays(model):
+    """The arrays that fully describe a pattern-signature model"""
+    return {
+        'feature_importance': np.asarray(model.feature_importance, dtype=float),
+        'seizure_signature': np.asarray(model.seizure_signature, dtype=float),
+        'normal_signature': np.asarray(model.normal_signature, dtype=float),
+        'threshold': np.asarray(model.threshold, dtype=float),
+    }
+
+
+def reference_arrays():
+    """Reference data every worker would otherwise derive from values.py
+
+    Only the publisher imports values.py; attached workers read these
+    arrays through load_generator.reference_data().
+    """
+    from load_generator import compute_reference_data
+    return compute_reference_data()
+
+
+def default_model():
+    """The model page2.load_model would pick first, without Streamlit"""
+    try:
+        with open(os.path.join(BASE_DIR, 'enhanced_epilepsy_model.pkl'), 'rb') as file:
+            return pickle.load(file)['model']
+    except Exception:
+        return EnhancedEpilepsyModel()
+
+
+def _layout(arrays):
+    """Offsets of each array after the header, 64-byte aligned"""
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout[name] = [offset, array.dtype.str, list(array.shape)]
+        offset += array.nbytes
+    header = json.dumps(layout).encode('utf-8')
+    data_start = -(-(_HEADER.size + len(header)) // _ALIGN) * _ALIGN
+    return layout, header, data_start, data_start + offset
+
+
+def _pack(buffer, arrays, layout, header, data_start):
+    _HEADER.pack_into(buffer, 0, _MAGIC, len(header))
+    buffer[_HEADER.size:_HEADER.size + len(header)] = header
+    for name, array in arrays.items():
+        offset = data_start + layout[name][0]
+        buffer[offset:offset + array.nbytes] = np.ascontiguousarray(array).tobytes()
+
+
+def _untrack(segment):
+    """Stop this process's resource tracker from unlinking the segment at exit"""
+    try:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    except Exception:
+        pass
+
+
+def publish(model=None, name=DEFAULT_SEGMENT, path=None, replace=True):
+    """Publish model and reference arrays once for all workers
+
+    With path, the plane is written to a memory-mapped file (portable, and
+    survives restarts); otherwise it goes to a named POSIX shared memory
+    segment that stays until unlink() is called.
+    """
+    arrays = model_arrays(model if model is not None else default_model())
+    arrays.update(reference_arrays())
+    layout, header, data_start, size = _layout(arrays)
+
+    if path is not None:
+        buffer = bytearray(size)
+        _pack(memoryview(buffer), arrays, layout, header, data_start)
+        # Write then rename, so attaching workers never see a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(buffer)
+        os.replace(tmp_path, path)
+        return path
+
+    if not SHARED_MEMORY_SUPPORT:
+        raise RuntimeError("Shared memory is not available; publish to a file path instead")
+    if replace:
+        unlink(name)
+    segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _untrack(segment)
+    _pack(segment.buf, arrays, layout, header, data_start)
+    segment.close()
+    return name
+
+
+class SharedPlane:
+    """Read-only views onto a published plane
+
+    Attaching only maps memory and parses a small JSON header; no array is
+    copied or unpickled, so memory per worker stays flat.
+    """
+
+    def __init__(self, name=DEFAULT_SEGMENT, path=None):
+        self._segment = None
+        self._mmap = None
+        if path is not None:
+            with open(path, 'rb') as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            buffer = self._mmap
+        else:
+            if not SHARED_MEMORY_SUPPORT:
+                raise RuntimeError("Shared memory is not available")
+            self._segment = shared_memory.SharedMemory(name=name)
+            _untrack(self._segment)
+            buffer = self._segment.buf
+
+        magic, header_length = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not a published EEG model plane")
+        layout = json.loads(bytes(buffer[_HEADER.size:_HEADER.size + header_length]))
+        data_start = -(-(_HEADER.size + header_length) // _ALIGN) * _ALIGN
+
+        self.arrays = {}
+        for array_name, (offset, dtype, shape) in layout.items():
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer,
+                               offset=data_start + offset)
+            array.flags.writeable = False
+            self.arrays[array_name] = array
+
+    def model(self):
+        """An EnhancedEpilepsyModel whose arrays are the shared views"""
+        model = EnhancedEpilepsyModel(threshold=float(self.arrays['threshold']))
+        model.feature_importance = self.arrays['feature_importance']
+        model.seizure_signature = self.arrays['seizure_signature']
+        model.normal_signature = self.arrays['normal_signature']
+        # The views are only valid while the mapping is open
+        model._shared_plane = self
+        return model
+
+
+def attach_from_environment():
+    """Attach to the plane named by the environment, or return None"""
+    path = os.environ.get(PATH_ENV)
+    name = os.environ.get(SEGMENT_ENV)
+    if path:
+        return SharedPlane(path=path)
+    if name:
+        return SharedPlane(name=name)
+    return None
+
+
+def unlink(name=DEFAULT_SEGMENT):
+    """Remove a published shared memory segment, if it exists"""
+    if not SHARED_MEMORY_SUPPORT:
+        return
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish the shared model/data plane for app workers")
+    parser.add_argument('action', choices=['publish', 'unlink'])
+    parser.add_argument('--name', default=DEFAULT_SEGMENT, help="shared memory segment name")
+    parser.add_argument('--path', default=None, help="publish to this memory-mapped file instead")
+    args = parser.parse_args()
+
+    if args.action == 'publish':
+        target = publish(name=args.name, path=args.path)
+        env, value = (PATH_ENV, os.path.abspath(target)) if args.path else (SEGMENT_ENV, target)
+        print(f"Published plane; start workers with {env}={value}")
+    else:
+        unlink(args.name)
+        print(f"Unlinked {args.name}")
+
+
+if __name__ == "__main__":
+    main()
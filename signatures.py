@@ -0,0 +1,12 @@
+import numpy as np
+
+# Global reference patterns, one value per EEG channel (see channels.py).
+# Models take copies; per-patient models start from these and adapt.
+SEIZURE_SIGNATURE = np.array([0.000031, 0.000027, 0.000012, 0.000056, 0.000041, -0.000018, 0.000052, 0.000052])
+NORMAL_SIGNATURE = np.array([-0.000053, 0.000023, 0.000078, 0.000123, 0.000118, -0.000047, -0.000061, -0.000061])
+
+# Feature importance optimized for seizure detection
+FEATURE_IMPORTANCE = np.array([0.25, 0.2, 0.1, 0.15, 0.15, 0.05, 0.1, 0.0])
+
+for _array in (SEIZURE_SIGNATURE, NORMAL_SIGNATURE, FEATURE_IMPORTANCE):
+    _array.setflags(write=False)
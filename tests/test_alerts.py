@@ -0,0 +1,162 @@
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import AlertDispatcher, FileSink, _file_lock, make_alert
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class SlowFailingSink:
+    name = 'slow'
+    remote = True
+
+    def send(self, alerts):
+        time.sleep(1.0)
+        raise OSError("notification service down")
+
+
+class BlockingSink:
+    name = 'blocking'
+    remote = True
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.received = []
+
+    def send(self, alerts):
+        self.release.wait()
+        self.received.extend(alerts)
+
+
+class FlakySink:
+    name = 'flaky'
+    remote = True
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.received = []
+
+    def send(self, alerts):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection refused")
+        self.received.extend(alerts)
+
+
+def _lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_failing_sink_does_not_delay_the_others(tmp_path):
+    alert_file = str(tmp_path / 'alerts.jsonl')
+    dispatcher = AlertDispatcher([SlowFailingSink(), FileSink(alert_file)],
+                                 spill_path=str(tmp_path / 'spill.jsonl'),
+                                 flush_interval=0.01, cooldown=0)
+    try:
+        start = time.time()
+        dispatcher.dispatch(make_alert('p1'))
+        assert _wait_for(lambda: len(_lines(alert_file)) == 1, timeout=0.8)
+        assert time.time() - start < 0.8
+        assert dispatcher.notifies_remote
+    finally:
+        dispatcher.close()
+    # The slow sink's alert is kept for replay, not lost
+    assert len(_lines(str(tmp_path / 'spill.slow.jsonl'))) == 1
+
+
+def test_dispatch_drops_on_a_full_queue_without_touching_disk(tmp_path):
+    sink = BlockingSink()
+    dispatcher = AlertDispatcher([sink], spill_path=str(tmp_path / 'spill.jsonl'),
+                                 max_queue=1, batch_size=1, flush_interval=0.01, cooldown=0)
+    try:
+        dispatcher.dispatch(make_alert('p1'))
+        assert _wait_for(lambda: dispatcher.stats()['queued'] == 0)
+        start = time.time()
+        queued = [dispatcher.dispatch(make_alert('p1')) for _ in range(20)]
+        assert time.time() - start < 0.5
+        # Only the first fits in the queue; the rest are reported as not queued
+        assert queued == [True] + [False] * 19
+        assert dispatcher.stats()['dropped'] == 19
+        assert os.listdir(tmp_path) == []
+    finally:
+        sink.release.set()
+        dispatcher.close()
+    assert len(sink.received) == 2
+
+
+def test_spilled_alerts_are_replayed_when_the_sink_recovers(tmp_path):
+    sink = FlakySink(failures=2)
+    dispatcher = AlertDispatcher([sink], spill_path=str(tmp_path / 'spill.jsonl'),
+                                 flush_interval=0.01, backoff=0.05, max_backoff=0.1, cooldown=0)
+    try:
+        alerts = [make_alert(f"p{i}") for i in range(5)]
+        for alert in alerts:
+            dispatcher.dispatch(alert)
+            time.sleep(0.02)
+        assert _wait_for(lambda: len(sink.received) == len(alerts))
+    finally:
+        dispatcher.close()
+    assert sorted(alert['id'] for alert in sink.received) == sorted(alert['id'] for alert in alerts)
+    assert dispatcher.stats()['failed'] == 2
+    assert not os.path.exists(str(tmp_path / 'spill.flaky.jsonl'))
+
+
+def test_local_only_dispatcher_does_not_claim_to_notify(tmp_path):
+    dispatcher = AlertDispatcher([FileSink(str(tmp_path / 'alerts.jsonl'))],
+                                 spill_path=str(tmp_path / 'spill.jsonl'))
+    try:
+        assert not dispatcher.notifies_remote
+    finally:
+        dispatcher.close()
+
+
+def test_spill_errors_do_not_stop_delivery(tmp_path):
+    sink = FlakySink(failures=1)
+    dispatcher = AlertDispatcher([sink], spill_path=str(tmp_path / 'missing' / 'spill.jsonl'),
+                                 flush_interval=0.01, backoff=0.05, max_backoff=0.1, cooldown=0)
+    try:
+        dispatcher.dispatch(make_alert('p1'))
+        # The failed batch cannot be spilled into a missing directory
+        assert _wait_for(lambda: dispatcher.stats()['dropped'] == 1)
+        stats = dispatcher.stats()['sinks']['flaky']
+        assert stats['alive'] and stats['errors'] >= 2
+        assert 'FileNotFoundError' in stats['last_error'][1]
+
+        time.sleep(0.15)
+        dispatcher.dispatch(make_alert('p2'))
+        assert _wait_for(lambda: len(sink.received) == 1)
+    finally:
+        dispatcher.close()
+
+
+def test_only_one_process_replays_a_spill(tmp_path):
+    spill = tmp_path / 'spill.flaky.jsonl'
+    spill.write_text(json.dumps(make_alert('p1')) + '\n')
+    sink = FlakySink(failures=0)
+    # Another process holds the replay lock
+    with _file_lock(str(spill) + '.replay.lock') as locked:
+        assert locked
+        dispatcher = AlertDispatcher([sink], spill_path=str(tmp_path / 'spill.jsonl'),
+                                     flush_interval=0.01, cooldown=0)
+        time.sleep(0.2)
+        assert sink.received == []
+        assert spill.exists()
+    try:
+        assert _wait_for(lambda: len(sink.received) == 1)
+    finally:
+        dispatcher.close()
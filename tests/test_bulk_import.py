@@ -0,0 +1,44 @@
+import io
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_import import iter_csv_chunks
+from channels import CHANNEL_NAMES
+
+
+def _rows(csv_text):
+    return np.concatenate(list(iter_csv_chunks(io.StringIO(csv_text))))
+
+
+def test_headerless_csv_keeps_rows_with_repeated_values():
+    # T8-P8-1 repeats T8-P8, so the first data row has duplicate values
+    rows = [[0.000012, 0.000034, 0.000056, 0.000078, 0.00009, 0.000001, 0.000052, 0.000052],
+            [0.000011, 0.000033, 0.000055, 0.000077, 0.00008, 0.000002, 0.000041, 0.000041]]
+    text = ''.join(','.join(str(v) for v in row) + '\n' for row in rows)
+    X = _rows(text)
+    assert X.shape == (2, len(CHANNEL_NAMES))
+    np.testing.assert_allclose(X, rows)
+
+
+def test_headerless_seven_channel_csv_repeats_t8_p8():
+    text = "1e-5,2e-5,3e-5,4e-5,5e-5,-1e-5,7e-5\n1e-5,2e-5,3e-5,4e-5,5e-5,-1e-5,7e-5\n"
+    X = _rows(text)
+    assert X.shape == (2, len(CHANNEL_NAMES))
+    np.testing.assert_allclose(X[:, -1], X[:, -2])
+
+
+def test_unrecognised_header_line_is_skipped():
+    text = "a,b,c,d,e,f,g,h\n" + ",".join(["1e-5"] * 8) + "\n"
+    assert _rows(text).shape == (1, len(CHANNEL_NAMES))
+
+
+def test_named_columns_are_reordered():
+    header = list(reversed(CHANNEL_NAMES))
+    values = list(range(len(header)))
+    text = ",".join(header) + "\n" + ",".join(str(v) for v in values) + "\n"
+    X = _rows(text)
+    np.testing.assert_allclose(X[0], [values[header.index(name)] for name in CHANNEL_NAMES])
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import numpy as np
+from sklearn.isotonic import IsotonicRegression
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calibration import IsotonicCalibrator
+
+
+def test_isotonic_matches_sklearn_on_separable_scores():
+    scores = np.arange(10, dtype=float)
+    labels = np.array([0] * 5 + [1] * 5)
+    expected = IsotonicRegression(out_of_bounds='clip').fit(scores, labels).predict(scores)
+    probabilities = IsotonicCalibrator().fit(scores, labels).predict_proba(scores)
+    np.testing.assert_allclose(probabilities, expected)
+    np.testing.assert_array_equal(probabilities, labels)
+
+
+def test_isotonic_matches_sklearn_on_noisy_scores():
+    rng = np.random.default_rng(0)
+    labels = (rng.random(500) < 0.3).astype(int)
+    scores = rng.normal(labels * 1.5, 1.0)
+    grid = np.linspace(scores.min() - 1, scores.max() + 1, 200)
+    reference = IsotonicRegression(out_of_bounds='clip').fit(scores, labels)
+    calibrator = IsotonicCalibrator().fit(scores, labels)
+    np.testing.assert_allclose(calibrator.predict_proba(scores), reference.predict(scores))
+    np.testing.assert_allclose(calibrator.predict_proba(grid), reference.predict(grid))
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ensemble import EnsembleScorer, SignatureScoreBackend
+from model_definitions import EnhancedEpilepsyModel
+from signatures import NORMAL_SIGNATURE, SEIZURE_SIGNATURE
+
+
+class SlowBackend:
+    """Stub backend that always misses the latency budget"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_anomaly_scores(self, X):
+        time.sleep(self.delay)
+        return np.full(len(X), 0.9)
+
+
+class FixedBackend:
+    def __init__(self, score):
+        self.score = score
+
+    def get_anomaly_scores(self, X):
+        return np.full(len(X), self.score)
+
+
+def test_slow_backend_does_not_starve_fast_ones():
+    backends = {'enhanced': SignatureScoreBackend(EnhancedEpilepsyModel()), 'slow': SlowBackend(0.5)}
+    scorer = EnsembleScorer(backends, latency_budget=0.1)
+    try:
+        for _ in range(8):
+            result = scorer.score(SEIZURE_SIGNATURE)
+            assert result['backends_used'] == ['enhanced']
+            assert result['backends_dropped'] == ['slow']
+            assert result['predictions'] is not None
+        # Work for the slow backend never piles up beyond its workers
+        assert scorer._in_flight['slow'] <= scorer.workers_per_backend
+        assert scorer._executors['slow']._work_queue.qsize() == 0
+    finally:
+        scorer.shutdown()
+
+
+def test_signature_backend_score_is_not_squashed():
+    backend = SignatureScoreBackend(EnhancedEpilepsyModel())
+    scores = backend.get_anomaly_scores(np.vstack([SEIZURE_SIGNATURE, NORMAL_SIGNATURE]))
+    assert scores[0] > 0.9
+    assert scores[1] < 0.1
+
+
+def test_vote_tie_goes_to_mean_score():
+    for other, expected in [(0.2, 1), (0.0, 0)]:
+        backends = {'enhanced': SignatureScoreBackend(EnhancedEpilepsyModel()), 'other': FixedBackend(other)}
+        scorer = EnsembleScorer(backends, method='vote', latency_budget=5.0)
+        try:
+            result = scorer.score(SEIZURE_SIGNATURE)
+            assert result['scores'][0] == 0.5
+            assert result['predictions'][0] == expected
+        finally:
+            scorer.shutdown()
+
+    backends = {'a': FixedBackend(0.6), 'b': FixedBackend(0.1)}
+    scorer = EnsembleScorer(backends, method='vote', latency_budget=5.0)
+    try:
+        assert scorer.score(SEIZURE_SIGNATURE)['predictions'][0] == 0
+    finally:
+        scorer.shutdown()
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prediction_log import PredictionLog
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_writer_survives_a_locked_database(tmp_path, monkeypatch):
+    path = str(tmp_path / 'log.db')
+    log = PredictionLog(path, flush_interval=0.05, max_retry_delay=0.2)
+    try:
+        # Hold an exclusive lock, and make the writer give up on it at once
+        blocker = sqlite3.connect(path, timeout=0)
+        blocker.execute("BEGIN EXCLUSIVE")
+        original_connect = sqlite3.connect
+        monkeypatch.setattr(sqlite3, 'connect',
+                            lambda *args, **kwargs: original_connect(*args, **{**kwargs, 'timeout': 0}))
+
+        log.log(np.zeros(8), 1, 0.9, 'test')
+        assert _wait_for(lambda: log.write_errors > 0)
+        assert log.last_error is not None
+        assert log.status()['writer_alive']
+
+        monkeypatch.undo()
+        blocker.rollback()
+        blocker.close()
+
+        # The kept batch is written once the lock is released
+        assert _wait_for(lambda: log.written == 1)
+        log.log(np.zeros(8), 0, 0.8, 'test')
+        assert _wait_for(lambda: log.written == 2)
+        assert log.last_error is None
+        assert log.dropped == 0
+    finally:
+        log.close()
+    assert log.count() == 2
+
+
+def test_pending_rows_stay_bounded_during_backoff(tmp_path, monkeypatch):
+    path = str(tmp_path / 'log.db')
+    log = PredictionLog(path, flush_interval=0.05, max_pending_rows=10, max_retry_delay=5.0)
+    try:
+        blocker = sqlite3.connect(path, timeout=0)
+        blocker.execute("BEGIN EXCLUSIVE")
+        original_connect = sqlite3.connect
+        monkeypatch.setattr(sqlite3, 'connect',
+                            lambda *args, **kwargs: original_connect(*args, **{**kwargs, 'timeout': 0}))
+
+        log.log(np.zeros(8), 1, 0.9, 'test')
+        assert _wait_for(lambda: log.write_errors > 0)
+        # Rows queued while the writer backs off are held up to the bound
+        for _ in range(50):
+            log.log(np.zeros(8), 0, 0.5, 'test')
+        assert _wait_for(lambda: log.status()['queued_batches'] == 0)
+        assert log.pending_rows <= 10
+        assert log.dropped == 51 - log.pending_rows
+
+        monkeypatch.undo()
+        blocker.rollback()
+        blocker.close()
+    finally:
+        log.close()
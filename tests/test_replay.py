@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_definitions import EnhancedEpilepsyModel
+from replay import replay
+
+
+@pytest.mark.parametrize('speed', [0, -1.0, float('nan'), float('inf')])
+def test_replay_rejects_invalid_speed(speed):
+    with pytest.raises(ValueError):
+        replay([], {'current': EnhancedEpilepsyModel()}, speed=speed)